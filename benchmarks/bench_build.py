@@ -0,0 +1,45 @@
+"""
+Time to turn a synthetic bank into genanki notes and write them to an .apkg, with 1 to N processes. Only the notes are
+built in the pool; the parent writes every one of them, which bounds what more processes can gain.
+
+    python -m benchmarks.bench_build --items 100000 --max-jobs 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import genanki
+
+from benchmarks.synthetic import make_results
+from sean_learns_german.apkg_writer import ApkgWriter
+from sean_learns_german.models.genanki_models import GENANKI_MODELS, build_notes
+from sean_learns_german.my_notion_client import GermanBankResultParser
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    items = list(GermanBankResultParser()._parse_results(make_results(args.items)))
+    print(f"{len(items):,} bank items, {os.cpu_count()} CPUs")
+
+    deck = genanki.Deck(deck_id=1, name="Benchmark")
+    baseline = None
+    for jobs in range(1, args.max_jobs + 1):
+        with tempfile.TemporaryDirectory() as directory:
+            started_at = time.perf_counter()
+            with ApkgWriter(os.path.join(directory, "benchmark.apkg")) as writer:
+                for _, built_note in build_notes(items, jobs, args.chunk_size):
+                    writer.add_row(deck, GENANKI_MODELS[built_note.row.model_id], built_note.row)
+            seconds = time.perf_counter() - started_at
+
+        baseline = baseline or seconds
+        print(f"  {jobs:>2} jobs {seconds:8.3f}s {len(items) / seconds:12,.0f} notes/s {baseline / seconds:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
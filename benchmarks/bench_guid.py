@@ -0,0 +1,59 @@
+"""
+Time to write a package of synthetic bank notes whose GUID is hashed on every access, as `GermanNote.guid` used to
+be, against notes whose GUID is computed once when they're built.
+
+    python -m benchmarks.bench_guid --items 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import typing
+
+import genanki
+
+from benchmarks.synthetic import make_results
+from sean_learns_german.apkg_writer import ApkgWriter
+from sean_learns_german.models.genanki_models import GermanNote
+from sean_learns_german.my_notion_client import GermanBankResultParser
+
+
+class UncachedGermanNote(GermanNote):
+    @property
+    def guid(self):
+        return genanki.guid_for(self.fields[0])
+
+    @guid.setter
+    def guid(self, guid: typing.Optional[str]):
+        pass
+
+
+def time_write(notes: typing.List[GermanNote]) -> float:
+    deck = genanki.Deck(deck_id=1, name="Benchmark")
+
+    with tempfile.TemporaryDirectory() as directory:
+        started_at = time.perf_counter()
+        with ApkgWriter(os.path.join(directory, "benchmark.apkg")) as writer:
+            writer.add_notes(deck, notes)
+        return time.perf_counter() - started_at
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100_000)
+    args = parser.parse_args()
+
+    items = list(GermanBankResultParser()._parse_results(make_results(args.items)))
+    print(f"{len(items):,} notes")
+
+    for name, note_class in [("hashed on access", UncachedGermanNote), ("cached at build", GermanNote)]:
+        started_at = time.perf_counter()
+        notes = [note_class.from_german_model(item) for item in items]
+        build_seconds = time.perf_counter() - started_at
+
+        write_seconds = time_write(notes)
+        print(f"  {name:<18} build {build_seconds:7.3f}s  write {write_seconds:7.3f}s  total {build_seconds + write_seconds:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
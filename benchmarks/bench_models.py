@@ -0,0 +1,84 @@
+"""
+Construction time and memory of the bank and sentence models, against the unslotted, enforce_typing-checked
+dataclasses they replaced.
+
+    python -m benchmarks.bench_models --count 100000
+"""
+import argparse
+import time
+import tracemalloc
+import typing
+
+from benchmarks.legacy_models import BankNoun as LegacyBankNoun, Noun as LegacyNoun, Verb as LegacyVerb
+from sean_learns_german.constants import ArticleType, Cardinality, GermanCase, NounGender, SpeechPerspective
+from sean_learns_german.models.german_models import BankNoun, Noun, Verb
+
+
+BANK_NOUN_KWARGS = dict(
+    german_word_singular="Mann",
+    german_word_plural="Männer",
+    english_word="man",
+    english_synonyms="",
+    gender=NounGender.MASCULINE,
+)
+NOUN_KWARGS = dict(
+    BANK_NOUN_KWARGS,
+    article_type=ArticleType.DEFINITE,
+    perspective=SpeechPerspective.THIRD_PERSON,
+    cardinality=Cardinality.SINGULAR,
+)
+VERB_KWARGS = dict(
+    german_word="sehen",
+    english_word="to see",
+    english_synonyms="",
+    conj_ich_1ps="sehe",
+    conj_du_2ps="siehst",
+    conj_er_3ps="sieht",
+    conj_wir_1pp="sehen",
+    conj_ihr_2pp="seht",
+    conj_sie_3pp="sehen",
+    requires_case=GermanCase.ACCUSATIVE,
+)
+
+
+def measure(build: typing.Callable[[], typing.Any], count: int) -> typing.Tuple[float, int]:
+    """
+    Returns the seconds taken to build `count` instances, and the bytes they take up.
+    """
+    started_at = time.perf_counter()
+    instances = [build() for _ in range(count)]
+    seconds = time.perf_counter() - started_at
+    del instances
+
+    tracemalloc.start()
+    instances = [build() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+
+    return seconds, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    # Tags are shared between instances, as they are when deriving `Noun`s from a `BankNoun`.
+    legacy_tags: typing.List[str] = []
+    tags: typing.Tuple[str, ...] = ()
+
+    for name, build in [
+        ("legacy BankNoun", lambda: LegacyBankNoun(tags=legacy_tags, **BANK_NOUN_KWARGS)),
+        ("BankNoun", lambda: BankNoun(tags=tags, notion_id=None, **BANK_NOUN_KWARGS)),
+        ("legacy Noun", lambda: LegacyNoun(tags=legacy_tags, **NOUN_KWARGS)),
+        ("Noun", lambda: Noun(tags=tags, notion_id=None, **NOUN_KWARGS)),
+        ("legacy Verb", lambda: LegacyVerb(tags=legacy_tags, **VERB_KWARGS)),
+        ("Verb", lambda: Verb(tags=tags, notion_id=None, **VERB_KWARGS)),
+    ]:
+        seconds, size = measure(build, args.count)
+        print(f"{name:<16} {seconds:8.3f}s {size / 2 ** 20:8.1f} MiB per {args.count:,} instances")
+
+
+if __name__ == "__main__":
+    main()
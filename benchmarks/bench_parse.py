@@ -0,0 +1,144 @@
+"""
+Compares the table-driven Notion row parser with the recursive `_parse_property` chain it replaced.
+
+    python -m benchmarks.bench_parse --rows 50000
+"""
+import argparse
+import time
+import typing
+
+from benchmarks.legacy_models import BankNoun, BankVocabulary, Phrase, Verb
+from benchmarks.synthetic import make_results
+from sean_learns_german.constants import BankCategory, GermanCase, NounGender, PartsOfSpeech
+from sean_learns_german.errors import MissingCategory, MissingGerman
+from sean_learns_german.notion_schema import extract_bank_item, parse_property
+
+
+class LegacyParser:
+    """
+    The parser as it was before `notion_schema`, kept verbatim as the baseline. It builds the models frozen in
+    `benchmarks.legacy_models`.
+    """
+
+    def _parse_property(self, property_dict: dict) -> typing.Optional[str]:
+        if property_dict['type'] == 'title':
+            try:
+                return self._parse_property(property_dict['title'][0])
+            except IndexError:
+                raise MissingGerman()
+        elif property_dict['type'] == 'rich_text':
+            if property_dict['rich_text']:
+                return self._parse_property(property_dict['rich_text'][0])
+            else:
+                return None
+        elif property_dict['type'] == 'text':
+            return property_dict['plain_text']
+        elif property_dict['type'] == 'select':
+            if property_dict['select']:
+                return property_dict['select']['name']
+            else:
+                return None
+        else:
+            raise Exception(f"Unknown property type '{property_dict['type']}'")
+
+    def _parse_result(self, result: dict):
+        if result['properties']['Category'] is None:
+            raise MissingCategory()
+
+        category = self._parse_property(result['properties']['Category'])
+        part_of_speech = self._parse_property(result['properties']['Part of speech'])
+
+        if category == BankCategory.PHRASE:
+            return Phrase(
+                german=self._parse_property(result['properties']['German']),
+                english=self._parse_property(result['properties']['English']),
+                # tags=row.tags,
+                tags=[],
+            )
+        elif part_of_speech == PartsOfSpeech.NOUN:
+            return BankNoun(
+                german_word_singular=self._parse_property(result['properties']['German']),
+                german_word_plural=self._parse_property(result['properties']['German plural']),
+                english_word=self._parse_property(result['properties']['English']),
+                english_synonyms=self._parse_property(result['properties']['English synonyms']) or "",
+                gender=NounGender.from_string(self._parse_property(result['properties']['Gender'])),
+                # tags=row.tags,
+                tags=[],
+            )
+        elif part_of_speech == PartsOfSpeech.VERB:
+            return Verb(
+                german_word=self._parse_property(result['properties']['German']),
+                english_word=self._parse_property(result['properties']['English']),
+                english_synonyms=self._parse_property(result['properties']['English synonyms']) or "",
+                conj_ich_1ps=self._parse_property(result['properties']['Conj (ich/1PS)']),
+                conj_du_2ps=self._parse_property(result['properties']['Conj (du/2PS)']),
+                conj_er_3ps=self._parse_property(result['properties']['Conj (er/3PS)']),
+                conj_wir_1pp=self._parse_property(result['properties']['Conj (wir/1PP)']),
+                conj_ihr_2pp=self._parse_property(result['properties']['Conj (ihr/2PP)']),
+                conj_sie_3pp=self._parse_property(result['properties']['Conj (Sie/3PP)']),
+                requires_case=GermanCase.from_string(self._parse_property(result['properties']['Requires case'])),
+                # tags=row.tags,
+                tags=[],
+            )
+        else:
+            return BankVocabulary(
+                german=self._parse_property(result['properties']['German']),
+                english_word=self._parse_property(result['properties']['English']),
+                english_synonyms=self._parse_property(result['properties']['English synonyms']) or "",
+                part_of_speech=self._parse_property(result['properties']['Part of speech']),
+                # tags=row.tags,
+                tags=[],
+            )
+
+
+def time_parser(parse: typing.Callable[[dict], typing.Any], results: typing.List[dict], repeat: int) -> float:
+    best = float('inf')
+
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        for result in results:
+            parse(result)
+        best = min(best, time.perf_counter() - started_at)
+
+    return best
+
+
+def parse_properties(parse_property: typing.Callable[[dict], typing.Any]) -> typing.Callable[[dict], None]:
+    """
+    Parses every property of a row without building a model, to time the parsing on its own.
+    """
+
+    def parse(result: dict) -> None:
+        for property_dict in result['properties'].values():
+            parse_property(property_dict)
+
+    return parse
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = make_results(args.rows)
+
+    print("Parsing and building models:")
+    for name, parse in [
+        ("recursive _parse_property", LegacyParser()._parse_result),
+        ("table-driven schema", extract_bank_item),
+    ]:
+        seconds = time_parser(parse, results, args.repeat)
+        print(f"  {name:<28} {seconds:8.3f}s {args.rows / seconds:12,.0f} rows/s")
+
+    print("Parsing properties only:")
+    for name, parse in [
+        ("recursive _parse_property", parse_properties(LegacyParser()._parse_property)),
+        ("PROPERTY_PARSERS table", parse_properties(parse_property)),
+    ]:
+        seconds = time_parser(parse, results, args.repeat)
+        print(f"  {name:<28} {seconds:8.3f}s {args.rows / seconds:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+The bank models as they were before they were slotted and type-checked by `validate_types`, frozen here (less
+`Pronoun`) as the baseline for the benchmarks. Don't update them along with `sean_learns_german.models`.
+"""
+import dataclasses
+import logging
+import random
+import typing
+
+try:
+    import enforce_typing
+except ImportError as e:
+    # Without its checks the baseline would be timed as something it never was.
+    raise ImportError("The baseline models need enforce_typing, a dev dependency: pipenv install --dev") from e
+
+from sean_learns_german.constants import ArticleType, Cardinality, GermanCase, NounGender, SpeechPerspective, PartsOfSpeech
+from sean_learns_german.errors import MissingGender, MissingGermanPluralWord
+
+
+@dataclasses.dataclass
+class Phrase:
+    german: str
+    english: str
+    tags: typing.List[str]
+
+
+@dataclasses.dataclass
+class BankWord:
+    tags: typing.List[str]
+
+
+@dataclasses.dataclass
+class BankVocabulary(BankWord):
+    german: str
+    english_word: str
+    english_synonyms: str
+    part_of_speech: PartsOfSpeech
+
+
+@enforce_typing.enforce_types
+@dataclasses.dataclass
+class BankNoun(BankWord):
+    german_word_singular: str
+    german_word_plural: typing.Optional[str]
+    english_word: str
+    english_synonyms: str
+    gender: NounGender
+
+    def __post_init__(self):
+        if not self.gender:
+            raise MissingGender()
+
+    def random_noun(self) -> 'Noun':
+        random_article_type = random.choice([article_type for article_type in list(ArticleType)])
+
+        return Noun(
+            article_type=random_article_type,
+            german_word_singular=self.german_word_singular,
+            german_word_plural=self.german_word_plural,
+            english_word=self.english_word,
+            english_synonyms=self.english_synonyms,
+            gender=self.gender,
+            perspective=SpeechPerspective.THIRD_PERSON,
+            cardinality=Cardinality.SINGULAR,
+            tags=self.tags,
+        )
+
+    def __lt__(self, o):
+        return self.german_word_singular < o.german_word_singular
+
+
+
+@dataclasses.dataclass
+class Noun(BankNoun):
+    article_type: ArticleType
+    perspective: SpeechPerspective
+    cardinality: Cardinality
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.cardinality == Cardinality.PLURAL and not self.german_word_plural:
+            raise MissingGermanPluralWord(self.german_word_singular)
+
+    def first(self) -> 'Noun':
+        return Noun(
+            german_word_singular=self.german_word_singular,
+            german_word_plural=self.german_word_plural,
+            english_word=self.english_word,
+            english_synonyms=self.english_synonyms,
+            gender=self.gender,
+            article_type=self.article_type.first(),
+            perspective=self.perspective,
+            cardinality=self.cardinality.first(),
+            tags=self.tags,
+        )
+
+    def rotate(self) -> 'Noun':
+        # Rotate: article_type, cardinality
+        rotated_cardinality = self.cardinality
+
+        try:
+            rotated_article_type = self.article_type.next()
+        except StopIteration:
+            rotated_article_type = self.article_type.first()
+            try:
+                rotated_cardinality = self.cardinality.next()
+            except StopIteration:
+                raise
+
+        try:
+            return Noun(
+                german_word_singular=self.german_word_singular,
+                german_word_plural=self.german_word_plural,
+                english_word=self.english_word,
+                english_synonyms=self.english_synonyms,
+                gender=self.gender,
+                article_type=rotated_article_type,
+                perspective=self.perspective,
+                cardinality=rotated_cardinality,
+                tags=self.tags,
+            )
+        except MissingGermanPluralWord as e:
+            raise StopIteration() from e
+
+    def get_article(self, case: GermanCase) -> typing.Optional[str]:
+        if self.cardinality == Cardinality.PLURAL:
+            if case == GermanCase.NOMINATIVE or case == GermanCase.ACCUSATIVE:
+                if self.article_type == ArticleType.DEFINITE:
+                    return 'die'
+                elif self.article_type == ArticleType.INDEFINITE:
+                    return None
+        elif self.cardinality == Cardinality.SINGULAR:
+            if self.article_type == ArticleType.DEFINITE:
+                if self.gender == NounGender.MASCULINE:
+                    if case == GermanCase.NOMINATIVE:
+                        return 'der'
+                    elif case == GermanCase.ACCUSATIVE:
+                        return 'den'
+                elif self.gender == NounGender.FEMININE:
+                    return 'die'
+                elif self.gender == NounGender.NEUTER:
+                    return 'das'
+            elif self.article_type == ArticleType.INDEFINITE:
+                if self.gender == NounGender.MASCULINE:
+                    if case == GermanCase.NOMINATIVE:
+                        return 'ein'
+                    elif case == GermanCase.ACCUSATIVE:
+                        return 'einen'
+                elif self.gender == NounGender.FEMININE:
+                    return 'eine'
+                elif self.gender == NounGender.NEUTER:
+                    return 'ein'
+        raise ValueError(f"Unexpected article type, gender, case, and/or cardinality: {self.article_type}, {self.gender}, {case}, {self.cardinality}")
+
+    def make_str(self, case: GermanCase) -> str:
+        article = self.get_article(case)
+        
+        if self.cardinality == Cardinality.SINGULAR:
+            word = self.german_word_singular
+        elif self.cardinality == Cardinality.PLURAL:
+            word = self.german_word_plural
+
+        if article:
+            return f"{article} {word}"
+        else:
+            return word
+
+    def make_english_str(self) -> str:
+        return ("the" if self.article_type == ArticleType.DEFINITE else "a") + " " + self.english_word
+
+    def make_hint(self, case: GermanCase) -> typing.Optional[str]:
+        return f"{self.english_word}, {self.article_type} {self.cardinality}"
+
+
+@enforce_typing.enforce_types
+@dataclasses.dataclass
+class Verb(BankWord):
+    german_word: str
+    english_word: str
+    english_synonyms: typing.Optional[str]
+    conj_ich_1ps: str
+    conj_du_2ps: str
+    conj_er_3ps: str
+    conj_wir_1pp: str
+    conj_ihr_2pp: str
+    conj_sie_3pp: str
+    requires_case: typing.Optional[GermanCase]
+
+    def __post_init__(self):
+        if self.requires_case is None:
+            logging.info("Verb %s is missing requires_case, assuming accusative", self.german_word)
+            self.requires_case = GermanCase.ACCUSATIVE
+        
+        if not all([
+            self.conj_ich_1ps,
+            self.conj_du_2ps,
+            self.conj_er_3ps,
+            self.conj_wir_1pp,
+            self.conj_ihr_2pp,
+            self.conj_sie_3pp,
+        ]):
+            logging.warning("Verb %s is not fully conjugated", self.german_word)
+
+    def conjugate(self, perspective: SpeechPerspective, cardinality: Cardinality):
+        if perspective == SpeechPerspective.FIRST_PERSON and cardinality == Cardinality.SINGULAR:
+            return self.conj_ich_1ps
+        elif perspective == SpeechPerspective.SECOND_PERSON and cardinality == Cardinality.SINGULAR:
+            return self.conj_du_2ps
+        elif perspective == SpeechPerspective.THIRD_PERSON and cardinality == Cardinality.SINGULAR:
+            return self.conj_er_3ps
+        elif perspective == SpeechPerspective.FIRST_PERSON and cardinality == Cardinality.PLURAL:
+            return self.conj_wir_1pp
+        elif perspective == SpeechPerspective.SECOND_PERSON and cardinality == Cardinality.PLURAL:
+            return self.conj_ihr_2pp
+        elif perspective == SpeechPerspective.THIRD_PERSON and cardinality == Cardinality.PLURAL:
+            return self.conj_sie_3pp
+        else:
+            raise ValueError(perspective)
+
+    def make_english_str(self) -> str:
+        return self.english_word
+
+    def __lt__(self, o):
+        return self.german_word < o.german_word
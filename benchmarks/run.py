@@ -0,0 +1,230 @@
+"""
+Times each stage of building decks from a synthetic bank on its own, at several bank sizes, and writes the results to
+a JSON file. Pass the file of an earlier run (on the same machine) as --compare to flag stages that got slower.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output results.json
+    python -m benchmarks.run --output new.json --compare results.json
+"""
+import argparse
+import dataclasses
+import datetime
+import gc
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+import genanki
+
+from benchmarks.synthetic import make_results
+from sean_learns_german.apkg_writer import ApkgWriter
+from sean_learns_german.models.basic_sentence import render_sentence
+from sean_learns_german.models.genanki_models import GermanNote
+from sean_learns_german.models.german_models import BankNoun, Verb
+from sean_learns_german.models.validation import validate_types
+from sean_learns_german.my_notion_client import GermanBankResultParser
+from sean_learns_german.notion_schema import parse_property
+from sean_learns_german.sentence_generation import SentenceSpace
+
+
+RESULTS_VERSION = 1
+
+Stage = typing.Callable[['SyntheticBank'], int]
+
+
+class SyntheticBank:
+    """
+    A synthetic bank of one size, with the input of every stage prepared up front so that each stage is timed alone.
+    """
+
+    def __init__(self, size: int):
+        self.results = make_results(size)
+        self.items = list(GermanBankResultParser()._parse_results(self.results))
+        self.model_arguments = [
+            (type(item), {field.name: getattr(item, field.name) for field in dataclasses.fields(item)})
+            for item in self.items
+        ]
+        self.notes = [GermanNote.from_german_model(item) for item in self.items]
+        self.sentence_space = SentenceSpace.from_words(
+            [item for item in self.items if isinstance(item, BankNoun)],
+            [item for item in self.items if isinstance(item, Verb)],
+            [item for item in self.items if isinstance(item, BankNoun)],
+        )
+        # As many sentences as there are rows, so every stage scales with the bank size.
+        self.sentences = list(itertools.islice(self.sentence_space, len(self.results)))
+
+
+def parse_properties(bank: SyntheticBank) -> int:
+    for result in bank.results:
+        for property_dict in result['properties'].values():
+            parse_property(property_dict)
+    return len(bank.results)
+
+
+def construct_models(bank: SyntheticBank) -> int:
+    # validate_types is what replaced enforce_typing's checks on construction.
+    for model, arguments in bank.model_arguments:
+        validate_types(model(**arguments))
+    return len(bank.model_arguments)
+
+
+def parse_results(bank: SyntheticBank) -> int:
+    for _ in GermanBankResultParser()._parse_results(bank.results):
+        pass
+    return len(bank.results)
+
+
+def build_notes(bank: SyntheticBank) -> int:
+    for item in bank.items:
+        GermanNote.from_german_model(item).guid
+    return len(bank.items)
+
+
+def enumerate_sentences(bank: SyntheticBank) -> int:
+    for _ in itertools.islice(bank.sentence_space, len(bank.results)):
+        pass
+    return len(bank.results)
+
+
+def render_sentences(bank: SyntheticBank) -> int:
+    # Each run renders from scratch, rather than from the renderings cached by the previous run.
+    render_sentence.cache_clear()
+    for sentence in bank.sentences:
+        sentence.to_anki_note('verb')
+    return len(bank.sentences)
+
+
+def write_apkg(bank: SyntheticBank) -> int:
+    deck = genanki.Deck(deck_id=1, name="Benchmark")
+    with tempfile.TemporaryDirectory() as directory:
+        with ApkgWriter(os.path.join(directory, "benchmark.apkg")) as writer:
+            writer.add_notes(deck, bank.notes)
+    return len(bank.notes)
+
+
+STAGES: typing.Dict[str, Stage] = {
+    'parse_properties': parse_properties,
+    'construct_models': construct_models,
+    'parse_results': parse_results,
+    'build_notes': build_notes,
+    'enumerate_sentences': enumerate_sentences,
+    'render_sentences': render_sentences,
+    'write_apkg': write_apkg,
+}
+
+
+def time_stage(stage: Stage, bank: SyntheticBank, repeat: int, min_seconds: float) -> dict:
+    """
+    The best of at least `repeat` runs, and of as many more as fit in `min_seconds`, so the millisecond timings of
+    small banks aren't left to chance. The garbage collector is paused while timing, as timeit does.
+    """
+    best = float('inf')
+    runs = 0
+    started_timing_at = time.perf_counter()
+
+    gc.disable()
+    try:
+        while runs < repeat or time.perf_counter() - started_timing_at < min_seconds:
+            started_at = time.perf_counter()
+            count = stage(bank)
+            best = min(best, time.perf_counter() - started_at)
+            runs += 1
+            gc.collect()
+    finally:
+        gc.enable()
+
+    return {'count': count, 'seconds': best, 'per_second': count / best if best else None, 'runs': runs}
+
+
+def git_commit() -> typing.Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, previous: dict, tolerance: float) -> typing.List[str]:
+    """
+    The stages (at each size) that took more than `tolerance` times as long as in `previous`.
+    """
+    regressions = []
+
+    for size, stages in results['sizes'].items():
+        for name, timing in stages.items():
+            previous_timing = previous['sizes'].get(size, {}).get(name)
+            if previous_timing is None:
+                continue
+
+            ratio = timing['seconds'] / previous_timing['seconds']
+            print(f"  {name:<20} {int(size):>8,} {previous_timing['seconds']:8.3f}s -> {timing['seconds']:8.3f}s {ratio:6.2f}x")
+            if ratio > tolerance:
+                regressions.append(f"{name} at {int(size):,}")
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument("--stages", nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="Keeps repeating each stage for this long.")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Results file of an earlier run to compare against.")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="With --compare, fails if a stage takes more than this many times as long as before.",
+    )
+    args = parser.parse_args()
+
+    results = {
+        'version': RESULTS_VERSION,
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'sizes': {},
+    }
+
+    for size in args.sizes:
+        print(f"{size:,} rows")
+        bank = SyntheticBank(size)
+        stages = results['sizes'][str(size)] = {}
+
+        for name in args.stages:
+            timing = stages[name] = time_stage(STAGES[name], bank, args.repeat, args.min_seconds)
+            print(f"  {name:<20} {timing['seconds']:8.3f}s {timing['per_second']:12,.0f}/s")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+
+        if previous.get('version') != RESULTS_VERSION:
+            sys.exit(f"Unsupported results version {previous.get('version')} in {args.compare}")
+
+        print(f"Compared with {args.compare} ({previous.get('commit') or 'unknown commit'}):")
+        regressions = compare(results, previous, args.tolerance)
+        if regressions:
+            sys.exit(f"Slower than {args.tolerance}x: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Synthetic Notion database query results, shaped like the rows of the German bank.
+"""
+import random
+import typing
+
+
+CONJUGATION_PROPERTIES = [
+    'Conj (ich/1PS)',
+    'Conj (du/2PS)',
+    'Conj (er/3PS)',
+    'Conj (wir/1PP)',
+    'Conj (ihr/2PP)',
+    'Conj (Sie/3PP)',
+]
+
+
+def _text(value: str) -> dict:
+    return {
+        'type': 'text',
+        'text': {'content': value, 'link': None},
+        'plain_text': value,
+        'href': None,
+    }
+
+
+def title(value: typing.Optional[str]) -> dict:
+    return {'id': 'title', 'type': 'title', 'title': [_text(value)] if value else []}
+
+
+def rich_text(value: typing.Optional[str]) -> dict:
+    return {'id': 'rt', 'type': 'rich_text', 'rich_text': [_text(value)] if value else []}
+
+
+def select(value: typing.Optional[str]) -> dict:
+    return {'id': 'sel', 'type': 'select', 'select': {'id': 'opt', 'name': value, 'color': 'default'} if value else None}
+
+
+def make_result(index: int, rng: random.Random) -> dict:
+    """
+    Builds one row. Roughly half are nouns, a quarter verbs, and the rest other vocabulary and phrases.
+    """
+    kind = rng.choices(['noun', 'verb', 'adjective', 'phrase'], weights=[50, 25, 15, 10])[0]
+    german = f"Wort{index}"
+
+    properties = {
+        'German': title(german),
+        'English': rich_text(f"word {index}"),
+        'English synonyms': rich_text(f"synonym {index}" if rng.random() < 0.3 else None),
+        'German plural': rich_text(f"{german}e" if kind == 'noun' and rng.random() < 0.8 else None),
+        'Gender': select(rng.choice(['der', 'die', 'das']) if kind == 'noun' else None),
+        'Category': select('Phrase' if kind == 'phrase' else 'Vocabulary'),
+        'Part of speech': select(None if kind == 'phrase' else kind),
+        'Requires case': select(rng.choice(['accusative', 'dative', None]) if kind == 'verb' else None),
+    }
+
+    for conjugation_property in CONJUGATION_PROPERTIES:
+        properties[conjugation_property] = rich_text(f"{german}{len(conjugation_property)}" if kind == 'verb' else None)
+
+    return {
+        'object': 'page',
+        'id': f"00000000-0000-0000-0000-{index:012d}",
+        'created_time': '2021-08-16T12:00:00.000Z',
+        'last_edited_time': '2021-08-16T12:00:00.000Z',
+        'archived': False,
+        'properties': properties,
+    }
+
+
+def make_results(count: int, seed: int = 0) -> typing.List[dict]:
+    rng = random.Random(seed)
+    return [make_result(index, rng) for index in range(count)]
@@ -0,0 +1,193 @@
+import itertools
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import typing
+import zipfile
+
+import genanki
+from genanki.apkg_col import APKG_COL
+from genanki.apkg_schema import APKG_SCHEMA
+
+
+class NoteRow(typing.NamedTuple):
+    """
+    A note as the package stores it: what `genanki.Note.write_to_db` inserts for it, and the ords of its cards. It's
+    plain data, so it can be built in another process and written without rebuilding the note.
+    """
+    guid: str
+    model_id: int
+    fields: str
+    tags: str
+    sort_field: str
+    card_ords: typing.Tuple[int, ...]
+
+    @classmethod
+    def from_note(cls, note: genanki.Note) -> 'NoteRow':
+        # The same checks and formatting as genanki.Note.write_to_db.
+        note._check_number_model_fields_matches_num_fields()
+        note._check_invalid_html_tags_in_fields()
+        return cls(
+            note.guid,
+            note.model.model_id,
+            note._format_fields(),
+            note._format_tags(),
+            note.sort_field,
+            tuple(card.ord for card in note.cards),
+        )
+
+    @property
+    def first_field(self) -> str:
+        return self.fields.split('\x1f', 1)[0]
+
+
+class ApkgWriter:
+    """
+    Writes an .apkg like `genanki.Package.write_to_file`, but note by note: notes and their cards are inserted into the
+    collection database in batches of `batch_size`, so memory doesn't grow with the number of notes. Decks and models
+    are registered as their first note arrives. The package is zipped up on `close()`.
+
+        with ApkgWriter("output.apkg") as writer:
+            writer.add_notes(deck, notes)
+    """
+
+    def __init__(self, filename: str, timestamp: typing.Optional[float] = None, batch_size: int = 1000):
+        self.filename = filename
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.batch_size = batch_size
+        self.note_count = 0
+
+        self._id_gen = itertools.count(int(self.timestamp * 1000))
+        self._decks: typing.Dict[int, genanki.Deck] = {}
+        # Model id -> (model, id of the first deck it was used in), as genanki records it.
+        self._models: typing.Dict[int, typing.Tuple[genanki.Model, int]] = {}
+        self._note_rows: typing.List[tuple] = []
+        self._card_rows: typing.List[tuple] = []
+
+        db_file, self._db_filename = tempfile.mkstemp(suffix='.anki2')
+        os.close(db_file)
+
+        self._connection = sqlite3.connect(self._db_filename)
+        # The database is a scratch file until it's zipped, so skip syncing it to disk.
+        self._connection.execute('PRAGMA synchronous = OFF')
+        self._connection.execute('PRAGMA journal_mode = MEMORY')
+        self._cursor = self._connection.cursor()
+        self._cursor.executescript(APKG_SCHEMA)
+        self._cursor.executescript(APKG_COL)
+
+    def __enter__(self) -> 'ApkgWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def add_note(self, deck: genanki.Deck, note: genanki.Note) -> None:
+        self.add_row(deck, note.model, NoteRow.from_note(note))
+
+    def add_row(self, deck: genanki.Deck, model: genanki.Model, row: NoteRow) -> None:
+        """
+        Adds a note that was already turned into a row, e.g. by another process. `model` must be the row's model.
+        """
+        self._decks.setdefault(deck.deck_id, deck)
+        self._models.setdefault(row.model_id, (model, deck.deck_id))
+
+        # The rows genanki.Note.write_to_db and genanki.Card.write_to_db insert, ids included.
+        mod = int(self.timestamp)
+        note_id = next(self._id_gen)
+        self._note_rows.append((note_id, row.guid, row.model_id, mod, -1, row.tags, row.fields, row.sort_field, 0, 0, ''))
+        for card_ord in row.card_ords:
+            self._card_rows.append(
+                (next(self._id_gen), note_id, deck.deck_id, card_ord, mod, -1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, '')
+            )
+        self.note_count += 1
+
+        if len(self._note_rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._cursor.executemany('INSERT INTO notes VALUES(?,?,?,?,?,?,?,?,?,?,?);', self._note_rows)
+        self._cursor.executemany(
+            'INSERT INTO cards VALUES(?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?);',
+            self._card_rows,
+        )
+        self._connection.commit()
+        self._note_rows.clear()
+        self._card_rows.clear()
+
+    def add_notes(self, deck: genanki.Deck, notes: typing.Iterable[genanki.Note]) -> int:
+        """
+        Adds notes from any iterable, e.g. a generator, and returns how many were added.
+        """
+        count = 0
+        for note in notes:
+            self.add_note(deck, note)
+            count += 1
+        return count
+
+    def _write_collection(self) -> None:
+        decks_json, models_json = self._cursor.execute('SELECT decks, models FROM col').fetchone()
+
+        decks = json.loads(decks_json)
+        decks.update({str(deck_id): deck.to_json() for deck_id, deck in self._decks.items()})
+
+        models = json.loads(models_json)
+        models.update({
+            str(model_id): model.to_json(self.timestamp, deck_id)
+            for model_id, (model, deck_id) in self._models.items()
+        })
+
+        self._cursor.execute('UPDATE col SET decks = ?, models = ?', (json.dumps(decks), json.dumps(models)))
+
+    def close(self) -> None:
+        """
+        Writes the decks and models, then zips the collection into `filename`.
+        """
+        try:
+            self._flush()
+            self._write_collection()
+            self._connection.commit()
+            self._connection.close()
+
+            with zipfile.ZipFile(self.filename, 'w') as package:
+                package.write(self._db_filename, 'collection.anki2')
+                package.writestr('media', json.dumps({}))
+        finally:
+            os.remove(self._db_filename)
+
+    def discard(self) -> None:
+        """
+        Drops everything written so far, without creating `filename`.
+        """
+        self._connection.close()
+        os.remove(self._db_filename)
+
+
+def read_notes(filename: str, models: typing.Mapping[int, genanki.Model]) -> typing.List[genanki.Note]:
+    """
+    The notes of an .apkg, in the order they were written, with their models looked up in `models` by id.
+    """
+    db_file, db_filename = tempfile.mkstemp(suffix='.anki2')
+    os.close(db_file)
+
+    try:
+        with zipfile.ZipFile(filename) as package, open(db_filename, 'wb') as f:
+            f.write(package.read('collection.anki2'))
+
+        connection = sqlite3.connect(db_filename)
+        try:
+            rows = connection.execute('SELECT guid, mid, flds, tags FROM notes ORDER BY id').fetchall()
+        finally:
+            connection.close()
+    finally:
+        os.remove(db_filename)
+
+    return [
+        genanki.Note(model=models[model_id], fields=fields.split('\x1f'), tags=tags.split(), guid=guid)
+        for guid, model_id, fields, tags in rows
+    ]
+
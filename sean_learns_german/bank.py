@@ -0,0 +1,134 @@
+import collections
+import dataclasses
+import enum
+import gzip
+import json
+import typing
+
+from sean_learns_german.constants import GermanCase, NounGender
+from sean_learns_german.models.german_models import BankNoun, BankVocabulary, BankWord, Phrase, Verb
+from sean_learns_german.synonyms import SynonymIndex
+
+
+BankItem = typing.Union[BankWord, Phrase]
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_MODELS: typing.Dict[str, type] = {
+    model.__name__: model
+    for model in [BankNoun, BankVocabulary, Phrase, Verb]
+}
+# Enum fields are stored by value. BankVocabulary.part_of_speech is left as the raw Notion string, like the parser does.
+SNAPSHOT_ENUM_FIELDS: typing.Dict[type, typing.Dict[str, typing.Type[enum.Enum]]] = {
+    BankNoun: {'gender': NounGender},
+    Verb: {'requires_case': GermanCase},
+}
+
+
+class GermanBank:
+    """
+    A snapshot of the German bank, loaded once and indexed by model class so that every command can
+    share a single pass over the Notion database.
+    """
+
+    def __init__(self, items: typing.Iterable[BankItem]):
+        self.items: typing.List[BankItem] = []
+        self._items_by_class: typing.Dict[type, typing.List[BankItem]] = collections.defaultdict(list)
+
+        for item in items:
+            self.items.append(item)
+            self._items_by_class[type(item)].append(item)
+
+        self._synonym_index: typing.Optional[SynonymIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> typing.Iterator[BankItem]:
+        return iter(self.items)
+
+    def of_type(self, cls: type) -> typing.List[BankItem]:
+        return list(self._items_by_class.get(cls, []))
+
+    @property
+    def nouns(self) -> typing.List[BankNoun]:
+        return self.of_type(BankNoun)
+
+    @property
+    def verbs(self) -> typing.List[Verb]:
+        return self.of_type(Verb)
+
+    @property
+    def vocabulary(self) -> typing.List[BankVocabulary]:
+        return self.of_type(BankVocabulary)
+
+    @property
+    def phrases(self) -> typing.List[Phrase]:
+        return self.of_type(Phrase)
+
+    @property
+    def synonym_index(self) -> SynonymIndex:
+        """
+        Built on first use, as only merging synonyms needs it.
+        """
+        if self._synonym_index is None:
+            self._synonym_index = SynonymIndex(self.items)
+        return self._synonym_index
+
+    def write_snapshot(self, filename: str) -> None:
+        """
+        Writes the parsed bank to a gzipped JSON file. Each model's field names are stored once, and each item as one
+        row of values tagged with its model name, in bank order, which keeps the file small and quick to load.
+        """
+        field_names_by_model = {
+            model: [field.name for field in dataclasses.fields(model)]
+            for model in SNAPSHOT_MODELS.values()
+        }
+        models = {
+            model_name: {'fields': field_names_by_model[model]}
+            for model_name, model in SNAPSHOT_MODELS.items()
+        }
+        rows = [
+            [type(item).__name__, *(getattr(item, field_name) for field_name in field_names_by_model[type(item)])]
+            for item in self.items
+        ]
+
+        with gzip.open(filename, 'wt', encoding='utf-8') as f:
+            json.dump(
+                {'version': SNAPSHOT_VERSION, 'models': models, 'rows': rows},
+                f,
+                ensure_ascii=False,
+                separators=(',', ':'),
+            )
+
+    @classmethod
+    def read_snapshot(cls, filename: str) -> 'GermanBank':
+        with gzip.open(filename, 'rt', encoding='utf-8') as f:
+            snapshot = json.load(f)
+
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported bank snapshot version {snapshot.get('version')} in {filename}")
+
+        readers = {
+            model_name: _snapshot_row_reader(SNAPSHOT_MODELS[model_name], model_snapshot['fields'])
+            for model_name, model_snapshot in snapshot['models'].items()
+        }
+
+        return cls(readers[row[0]](row[1:]) for row in snapshot['rows'])
+
+
+def _snapshot_row_reader(model: type, field_names: typing.List[str]) -> typing.Callable[[list], BankItem]:
+    enum_fields = [
+        (field_names.index(field_name), converter)
+        for field_name, converter in SNAPSHOT_ENUM_FIELDS.get(model, {}).items()
+    ]
+    tags_index = field_names.index('tags')
+
+    def read_row(row: list) -> BankItem:
+        row[tags_index] = tuple(row[tags_index])
+        for index, converter in enum_fields:
+            if row[index] is not None:
+                row[index] = converter(row[index])
+
+        return model(**dict(zip(field_names, row)))
+
+    return read_row
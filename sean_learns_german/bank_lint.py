@@ -0,0 +1,113 @@
+"""
+Finds bank items whose German collides or nearly collides. Notes are identified by their German, so two rows with the
+same German become one Anki note, and near-duplicates (casing, umlauts spelled out, stray whitespace, typos) become two.
+"""
+import collections
+import math
+import typing
+
+from sean_learns_german.models.german_models import BankNoun, BankVocabulary, Phrase, Verb
+
+
+_SPELLED_OUT = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+
+
+def german_text(item: typing.Any) -> str:
+    """
+    The German that a bank item's note is identified by (its first field).
+    """
+    if isinstance(item, BankNoun):
+        return item.german_word_singular
+    elif isinstance(item, Verb):
+        return item.german_word
+    elif isinstance(item, (BankVocabulary, Phrase)):
+        return item.german
+    raise ValueError(f"Unexpected bank item {item}")
+
+
+def normalize_german(german: str) -> str:
+    """
+    Casefolds, spells out umlauts and ß, and collapses whitespace, so "Straße ", "strasse" and "STRASSE" are equal.
+    """
+    return ' '.join(german.casefold().translate(_SPELLED_OUT).split())
+
+
+def trigrams(key: str) -> typing.FrozenSet[str]:
+    padded = f"  {key} "
+    return frozenset(padded[index:index + 3] for index in range(len(padded) - 2))
+
+
+def find_exact_duplicates(items: typing.Iterable[typing.Any]) -> typing.List[typing.List[typing.Any]]:
+    """
+    Groups of items with the same German, which their notes' GUIDs are built from. Items that only match once
+    normalized ("Essen" and "essen") get different GUIDs, so they're near duplicates instead.
+    """
+    items_by_text: typing.Dict[str, typing.List[typing.Any]] = collections.defaultdict(list)
+    for item in items:
+        items_by_text[german_text(item)].append(item)
+
+    return [text_items for text_items in items_by_text.values() if len(text_items) > 1]
+
+
+def find_near_duplicates(
+    items: typing.Iterable[typing.Any],
+    threshold: float = 0.8,
+) -> typing.List[typing.Tuple[float, typing.Any, typing.Any]]:
+    """
+    Pairs of items with different German that is the same once normalized (similarity 1.0), or whose normalized
+    German's trigram sets have a Jaccard similarity of at least `threshold`. Each German text is represented by its
+    first item, and each normalized German by its first text's.
+
+    Comparing every pair would be quadratic, so this uses prefix filtering: with each trigram set sorted rarest
+    trigram first, two sets can only reach the threshold if their first |set| - ceil(threshold * |set|) + 1 trigrams
+    share one. Only those prefixes are indexed, and only sets that share a prefix trigram and have compatible sizes are
+    compared.
+    """
+    # Normalized German -> German -> its first item.
+    items_by_key: typing.Dict[str, typing.Dict[str, typing.Any]] = collections.defaultdict(dict)
+    for item in items:
+        items_by_key[normalize_german(german_text(item))].setdefault(german_text(item), item)
+
+    pairs = []
+    for text_items in items_by_key.values():
+        text_items = list(text_items.values())
+        for index, item in enumerate(text_items):
+            pairs.extend((1.0, item, other_item) for other_item in text_items[index + 1:])
+
+    first_items = {key: next(iter(text_items.values())) for key, text_items in items_by_key.items()}
+    keys = list(first_items)
+    key_trigrams = [trigrams(key) for key in keys]
+
+    frequencies: typing.Counter[str] = collections.Counter(
+        trigram for trigram_set in key_trigrams for trigram in trigram_set
+    )
+
+    # Visit the sets from smallest to largest, so each set only needs comparing with the ones indexed before it.
+    order = sorted(range(len(keys)), key=lambda position: len(key_trigrams[position]))
+    prefix_index: typing.Dict[str, typing.List[int]] = collections.defaultdict(list)
+
+    for position in order:
+        trigram_set = key_trigrams[position]
+        size = len(trigram_set)
+        # The epsilon keeps float error (e.g. 0.7 * 10 = 7.000000000000001) from tightening the filters.
+        min_size = threshold * size - 1e-9
+        prefix_length = size - math.ceil(min_size) + 1
+        prefix = sorted(trigram_set, key=lambda trigram: (frequencies[trigram], trigram))[:prefix_length]
+
+        candidates = set()
+        for trigram in prefix:
+            for other in prefix_index[trigram]:
+                # Sets are visited by size, so `other` is no larger; it's too small if it can't reach the threshold.
+                if len(key_trigrams[other]) >= min_size:
+                    candidates.add(other)
+            prefix_index[trigram].append(position)
+
+        for other in candidates:
+            other_set = key_trigrams[other]
+            intersection = len(trigram_set & other_set)
+            similarity = intersection / (size + len(other_set) - intersection)
+            if similarity >= threshold:
+                pairs.append((similarity, first_items[keys[other]], first_items[keys[position]]))
+
+    pairs.sort(key=lambda pair: (-pair[0], german_text(pair[1]), german_text(pair[2])))
+    return pairs
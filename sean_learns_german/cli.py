@@ -1,15 +1,36 @@
+import contextlib
+import functools
 import logging
+import random
+import typing
 
 import click
 import genanki
 
-from sean_learns_german.constants import BankCategory
-from sean_learns_german.errors import MissingGermanPluralWord
-from sean_learns_german.models.genanki_models import GermanNote
+from sean_learns_german.apkg_writer import ApkgWriter, read_notes
+from sean_learns_german.bank import GermanBank
+from sean_learns_german.bank_lint import find_exact_duplicates, find_near_duplicates, german_text
+from sean_learns_german.cli_options import DATABASE_ID_HELP, parse_database_ids
+from sean_learns_german.constants import BankCategory, GermanCase, GuidSource
+from sean_learns_german.errors import MissingGermanPluralWord, NotionQueryFailed
+from sean_learns_german.manifest import DeckManifest, manifest_filename_for
+from sean_learns_german.models.genanki_models import GENANKI_MODELS, build_notes
 from sean_learns_german.models.german_models import BankWord, Phrase
-from sean_learns_german.models.basic_sentence import BasicSentence
+from sean_learns_german.models.basic_sentence import BLANK_POSITIONS, BasicSentence
 from sean_learns_german.my_notion_client import GermanBankNotionClient
+from sean_learns_german.notion_cache import NotionQueryCache
 from sean_learns_german.play import play
+from sean_learns_german.sentence_generation import (
+    SentenceSpace,
+    distinct_notes,
+    filter_words,
+    interleave_shards,
+    parallel_sentence_notes,
+    sentence_indexes,
+    shard_size,
+    unique_guids,
+)
+from sean_learns_german.synonyms import SynonymGroup
 from sean_learns_german.words import BANK_NOUNS, BANK_VERBS
 
 
@@ -18,6 +39,62 @@ logging.basicConfig(
 )
 
 
+def _parse_shard(ctx: click.Context, param: click.Parameter, value: typing.Optional[str]) -> typing.Tuple[int, int]:
+    if value is None:
+        return 0, 1
+
+    try:
+        shard, shard_count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise click.BadParameter("should look like i/N, e.g. 0/4")
+
+    if not 0 <= shard < shard_count:
+        raise click.BadParameter(f"shard {shard} should be between 0 and {shard_count - 1}")
+
+    return shard, shard_count
+
+
+def _exit_on_notion_failure(command: typing.Callable) -> typing.Callable:
+    """
+    Reports a Notion query that failed for good as an error rather than a traceback. The cache keeps the pages fetched
+    before the failure, so running the command again carries on from there.
+    """
+    @functools.wraps(command)
+    def wrapper(*args, **kwargs):
+        try:
+            return command(*args, **kwargs)
+        except NotionQueryFailed as e:
+            raise click.ClickException(str(e)) from e
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def _notion_client(
+    token: str,
+    databases: typing.Dict[str, str],
+    cache_filename: typing.Optional[str] = None,
+    **options: typing.Any,
+) -> typing.Generator[GermanBankNotionClient, None, None]:
+    """
+    A client for `databases`, caching them in `cache_filename` if given. Its session and cache are closed on the way
+    out, so use the client (e.g. its streaming `load_bank_items()`) inside the `with`.
+    """
+    notion_cache = NotionQueryCache(cache_filename) if cache_filename else None
+    try:
+        with GermanBankNotionClient(
+            token,
+            database_ids=list(databases),
+            source_names=databases,
+            cache=notion_cache,
+            **options,
+        ) as notion_client:
+            yield notion_client
+    finally:
+        if notion_cache is not None:
+            notion_cache.close()
+
+
 @click.group()
 def cli_group():
     pass
@@ -28,7 +105,6 @@ def cli_group():
     "--token",
     type=str,
     help="Get from token_v2 value stored in www.notion.so cookies. Link: chrome://settings/cookies/detail?site=www.notion.so",
-    required=True,
     envvar="NOTION_API_TOKEN",
 )
 @click.option(
@@ -36,33 +112,158 @@ def cli_group():
     type=str,
     default="output.apkg",
 )
-def generate_decks(token: str, output_filename: str) -> None:
+@click.option("--online/--offline", default=True, help="Offline builds read the bank from --snapshot instead of Notion.")
+@click.option("--snapshot", type=str, help="Bank snapshot file written by export-bank.")
+@click.option(
+    "--database-id",
+    "databases",
+    type=str,
+    multiple=True,
+    callback=parse_database_ids,
+    help=DATABASE_ID_HELP,
+)
+@click.option(
+    "--cache-filename",
+    type=str,
+    default="notion_cache.sqlite3",
+    help="SQLite file caching the Notion database between runs, so only edited rows are downloaded.",
+)
+@click.option("--cache/--no-cache", default=True, help="Use the local Notion cache.")
+@click.option("--full-refresh", is_flag=True, default=False, help="Re-download the whole Notion database into the cache.")
+@click.option(
+    "--prune-deleted",
+    is_flag=True,
+    default=False,
+    help="Lists every Notion page to drop rows deleted since the last sync from the cache, rather than waiting for its "
+    "weekly full refresh.",
+)
+@click.option("--jobs", type=int, default=1, help="Builds the notes in this many processes.")
+@click.option(
+    "--changed-only",
+    is_flag=True,
+    default=False,
+    help="Only writes the notes that are new or changed since the last export, going by its manifest.",
+)
+@click.option(
+    "--merge-synonyms",
+    is_flag=True,
+    default=False,
+    help="Merges words of the same part of speech sharing an English meaning into one note answering with all of them.",
+)
+@click.option(
+    "--guid-source",
+    type=click.Choice([guid_source.value for guid_source in GuidSource]),
+    default=GuidSource.GERMAN.value,
+    help="Identifies notes by their German text, or by their Notion page (so edits to the German keep the review "
+    "history). Switching makes Anki import every note as new.",
+)
+@click.option(
+    "--load-report",
+    type=str,
+    help="JSON file to write statistics of loading the bank from Notion to: rows skipped by error, and timings.",
+)
+@_exit_on_notion_failure
+def generate_decks(
+    token: str,
+    output_filename: str,
+    online: bool,
+    snapshot: str,
+    databases: typing.Dict[str, str],
+    cache_filename: str,
+    cache: bool,
+    full_refresh: bool,
+    prune_deleted: bool,
+    jobs: int,
+    changed_only: bool,
+    merge_synonyms: bool,
+    guid_source: str,
+    load_report: typing.Optional[str],
+) -> None:
     """
     Scrapes the Notion table bank, and converts them into Anki decks ready for importing.
     """
-    decks = {
-        BankCategory.VOCABULARY: genanki.Deck(
-            deck_id=1854703173,  # Hard-coded value selected by me
-            name="German::Vocabulary",
-        ),
-        BankCategory.PHRASE: genanki.Deck(
-            deck_id=1568577201,  # Hard-coded value selected by me
-            name="German::Phrases",
-        ),
-    }
-
-    for german_bank_item in GermanBankNotionClient(token).load_bank_items():
-        if isinstance(german_bank_item, BankWord):
-            deck = decks[BankCategory.VOCABULARY]
-        elif isinstance(german_bank_item, Phrase):
-            deck = decks[BankCategory.PHRASE]
+    with contextlib.ExitStack() as stack:
+        if online:
+            if not token:
+                raise click.UsageError("Missing --token")
+
+            notion_client = stack.enter_context(_notion_client(
+                token,
+                databases,
+                cache_filename if cache else None,
+                full_refresh=full_refresh,
+                prune_deleted=prune_deleted,
+            ))
+            # Streamed from Notion while the notes are written, so the client stays open until then.
+            german_bank_items = notion_client.load_bank_items()
         else:
-            raise ValueError(f"Unexpected bank item {german_bank_item}")
+            if not snapshot:
+                raise click.UsageError("--offline needs a --snapshot")
+            if load_report:
+                raise click.UsageError("--load-report needs --online")
+
+            german_bank_items = GermanBank.read_snapshot(snapshot)
+
+        if merge_synonyms:
+            # Grouping needs the whole bank at once.
+            if not isinstance(german_bank_items, GermanBank):
+                german_bank_items = GermanBank(german_bank_items)
+            german_bank_items = german_bank_items.synonym_index.merged()
+
+        decks = {
+            BankCategory.VOCABULARY: genanki.Deck(
+                deck_id=1854703173,  # Hard-coded value selected by me
+                name="German::Vocabulary",
+            ),
+            BankCategory.PHRASE: genanki.Deck(
+                deck_id=1568577201,  # Hard-coded value selected by me
+                name="German::Phrases",
+            ),
+        }
+
+        # The manifest next to the output records what the last export contained.
+        manifest_filename = manifest_filename_for(output_filename)
+        previous_manifest = DeckManifest.read(manifest_filename)
+        manifest = DeckManifest()
+        duplicate_notes = 0
+
+        built_notes = build_notes(german_bank_items, jobs, guid_source=GuidSource(guid_source))
+        with ApkgWriter(output_filename) as writer:
+            for german_bank_item, built_note in built_notes:
+                if isinstance(german_bank_item, (BankWord, SynonymGroup)):
+                    deck = decks[BankCategory.VOCABULARY]
+                elif isinstance(german_bank_item, Phrase):
+                    deck = decks[BankCategory.PHRASE]
+                else:
+                    raise ValueError(f"Unexpected bank item {german_bank_item}")
+
+                if built_note.guid in manifest:
+                    # The same note from another row or database (e.g. one word in two courses): keep the first.
+                    duplicate_notes += 1
+                    continue
+
+                manifest.record(built_note.guid, built_note.content_hash, built_note.row.first_field)
+                if changed_only and previous_manifest.has_unchanged(built_note.guid, built_note.content_hash):
+                    continue
 
-        german_note = GermanNote.from_german_model(german_bank_item)
-        deck.add_note(german_note)
+                writer.add_row(deck, GENANKI_MODELS[built_note.row.model_id], built_note.row)
 
-    genanki.Package(decks.values()).write_to_file(output_filename)
+        manifest.write(manifest_filename)
+
+        if load_report:
+            notion_client.load_report.write(load_report)
+
+    if duplicate_notes:
+        click.echo(f"Skipped {duplicate_notes} notes with the same GUID as an earlier note.")
+
+    deleted_notes = manifest.deleted_since(previous_manifest)
+    if deleted_notes:
+        click.echo(f"{len(deleted_notes)} notes from the last export are gone from the bank; delete them in Anki:")
+        for guid, first_field in deleted_notes:
+            click.echo(f"  {first_field} (guid {guid})")
+
+    if changed_only:
+        click.echo(f"Wrote {writer.note_count} new or changed notes of {len(manifest)}.")
     click.echo(f"Complete! Now import {output_filename} to Anki, fix any changes, and sync Anki to AnkiCloud.")
 
 
@@ -71,49 +272,270 @@ def generate_decks(token: str, output_filename: str) -> None:
     "--token",
     type=str,
     help="Integration token generated by Notion",
+    required=True,
+    envvar="NOTION_API_TOKEN",
 )
-@click.option("--online/--offline", default=True, help="")
-@click.option("--output-filename", type=str, default="grammar_output.apkg")
-def generate_sentences(token: str, output_filename: str, online: bool):
+@click.option("--snapshot", type=str, default="bank_snapshot.json.gz", help="File to write the bank snapshot to.")
+@click.option(
+    "--database-id",
+    "databases",
+    type=str,
+    multiple=True,
+    callback=parse_database_ids,
+    help=DATABASE_ID_HELP,
+)
+@click.option(
+    "--cache-filename",
+    type=str,
+    default="notion_cache.sqlite3",
+    help="SQLite file caching the Notion database between runs, so only edited rows are downloaded.",
+)
+@click.option("--cache/--no-cache", default=True, help="Use the local Notion cache.")
+@click.option("--full-refresh", is_flag=True, default=False, help="Re-download the whole Notion database into the cache.")
+@click.option(
+    "--prune-deleted",
+    is_flag=True,
+    default=False,
+    help="Lists every Notion page to drop rows deleted since the last sync from the cache, rather than waiting for its "
+    "weekly full refresh.",
+)
+@click.option(
+    "--load-report",
+    type=str,
+    help="JSON file to write statistics of loading the bank from Notion to: rows skipped by error, and timings.",
+)
+@_exit_on_notion_failure
+def export_bank(
+    token: str,
+    snapshot: str,
+    databases: typing.Dict[str, str],
+    cache_filename: str,
+    cache: bool,
+    full_refresh: bool,
+    prune_deleted: bool,
+    load_report: typing.Optional[str],
+) -> None:
     """
-    Generates sentences
+    Exports the parsed Notion bank to a snapshot file, for use with --offline.
     """
-    notion_client = GermanBankNotionClient(token)
+    with _notion_client(
+        token,
+        databases,
+        cache_filename if cache else None,
+        full_refresh=full_refresh,
+        prune_deleted=prune_deleted,
+    ) as notion_client:
+        bank = notion_client.load_bank()
+        if load_report:
+            notion_client.load_report.write(load_report)
+    bank.write_snapshot(snapshot)
+    click.echo(f"Exported {len(bank)} bank items to {snapshot}.")
+
 
+def _describe_bank_item(item) -> str:
+    return f"{german_text(item)!r} ({type(item).__name__}, {item.notion_id or 'no Notion id'})"
+
+
+@cli_group.command()
+@click.option(
+    "--token",
+    type=str,
+    help="Integration token generated by Notion",
+    envvar="NOTION_API_TOKEN",
+)
+@click.option("--online/--offline", default=True, help="Offline runs read the bank from --snapshot instead of Notion.")
+@click.option("--snapshot", type=str, help="Bank snapshot file written by export-bank.")
+@click.option(
+    "--database-id",
+    "databases",
+    type=str,
+    multiple=True,
+    callback=parse_database_ids,
+    help=DATABASE_ID_HELP,
+)
+@click.option(
+    "--cache-filename",
+    type=str,
+    default="notion_cache.sqlite3",
+    help="SQLite file caching the Notion database between runs, so only edited rows are downloaded.",
+)
+@click.option("--cache/--no-cache", default=True, help="Use the local Notion cache.")
+@click.option(
+    "--threshold",
+    type=click.FloatRange(0.0, 1.0),
+    default=0.8,
+    help="Trigram similarity (Jaccard) from which two German texts count as near duplicates.",
+)
+@click.option(
+    "--load-report",
+    type=str,
+    help="JSON file to write statistics of loading the bank from Notion to: rows skipped by error, and timings.",
+)
+@_exit_on_notion_failure
+def lint_bank(
+    token: str,
+    online: bool,
+    snapshot: str,
+    databases: typing.Dict[str, str],
+    cache_filename: str,
+    cache: bool,
+    threshold: float,
+    load_report: typing.Optional[str],
+) -> None:
+    """
+    Reports bank items with the same German (so they'd collide into one Anki note), or nearly the same German: equal
+    once normalized, or with similar trigrams. Exits with an error if there are exact duplicates.
+    """
     if online:
         if not token:
-            click.abort("Missing token")
-
-        nouns = notion_client.get_bank_nouns()
-        verbs = [
-            verb
-            for verb in notion_client.get_bank_verbs()
-            if all([
-                verb.conj_ich_1ps,
-                verb.conj_du_2ps,
-                verb.conj_er_3ps,
-                verb.conj_wir_1pp,
-                verb.conj_ihr_2pp,
-                verb.conj_sie_3pp,
-            ]) and 'generate' in verb.tags
-        ]
+            raise click.UsageError("Missing --token")
+
+        with _notion_client(token, databases, cache_filename if cache else None) as notion_client:
+            bank = notion_client.load_bank()
+            if load_report:
+                notion_client.load_report.write(load_report)
     else:
-        nouns = BANK_NOUNS
-        verbs = BANK_VERBS
+        if not snapshot:
+            raise click.UsageError("--offline needs a --snapshot")
+        if load_report:
+            raise click.UsageError("--load-report needs --online")
+
+        bank = GermanBank.read_snapshot(snapshot)
+
+    exact_duplicates = find_exact_duplicates(bank)
+    click.echo(f"{len(exact_duplicates)} groups of exact duplicates (the same German, so the same note GUID):")
+    for items in exact_duplicates:
+        click.echo(f"  {', '.join(_describe_bank_item(item) for item in items)}")
+
+    near_duplicates = find_near_duplicates(bank, threshold)
+    click.echo(f"{len(near_duplicates)} pairs of near duplicates:")
+    for similarity, item, other_item in near_duplicates:
+        click.echo(f"  {similarity:.2f} {_describe_bank_item(item)} ~ {_describe_bank_item(other_item)}")
+
+    if exact_duplicates:
+        raise click.exceptions.Exit(1)
 
-    deck = genanki.Deck(
+
+def _grammar_deck() -> genanki.Deck:
+    return genanki.Deck(
         deck_id=1878326705,  # Hard-coded value selected by me
         name="German::Grammar",
     )
 
+
+@cli_group.command()
+@click.option(
+    "--token",
+    type=str,
+    help="Integration token generated by Notion",
+    envvar="NOTION_API_TOKEN",
+)
+@click.option("--online/--offline", default=True, help="Offline runs use --snapshot, or a few built-in words without one.")
+@click.option("--snapshot", type=str, help="Bank snapshot file written by export-bank.")
+@click.option(
+    "--database-id",
+    "databases",
+    type=str,
+    multiple=True,
+    callback=parse_database_ids,
+    help=DATABASE_ID_HELP,
+)
+@click.option("--output-filename", type=str, default="grammar_output.apkg")
+@click.option("--batch", type=int, help="Writes N notes from randomly sampled sentences, without prompting.")
+@click.option("--all", "all_", is_flag=True, help="Writes a note for every sentence, without prompting.")
+@click.option("--tag", "tags", type=str, multiple=True, help="Only uses words with this tag (batch mode).")
+@click.option(
+    "--case",
+    "cases",
+    type=click.Choice([case.value for case in GermanCase]),
+    multiple=True,
+    help="Only uses verbs requiring this case (batch mode).",
+)
+@click.option(
+    "--blank",
+    "blank_positions",
+    type=click.Choice(BLANK_POSITIONS),
+    multiple=True,
+    help="Blanks out this part of the sentence (batch mode). Defaults to one note for each.",
+)
+@click.option("--seed", type=int, help="Seeds the random choices, so runs can be reproduced.")
+@click.option(
+    "--shard",
+    type=str,
+    callback=_parse_shard,
+    help="Only renders every N-th sentence from the i-th on (batch mode), e.g. 2/4, so shards can run in parallel; "
+    "with --batch, each writes its share of the notes. merge-shards puts the shards together.",
+)
+@click.option("--jobs", type=int, default=1, help="Generates in this many processes (batch mode).")
+@_exit_on_notion_failure
+def generate_sentences(
+    token: str,
+    output_filename: str,
+    online: bool,
+    snapshot: str,
+    databases: typing.Dict[str, str],
+    batch: typing.Optional[int],
+    all_: bool,
+    tags: typing.Tuple[str, ...],
+    cases: typing.Tuple[str, ...],
+    blank_positions: typing.Tuple[str, ...],
+    seed: typing.Optional[int],
+    shard: typing.Tuple[int, int],
+    jobs: int,
+):
+    """
+    Generates sentences
+    """
+    if batch is not None and all_:
+        raise click.UsageError("--batch and --all can't be used together")
+    if online or snapshot:
+        if online:
+            if not token:
+                raise click.UsageError("Missing --token")
+
+            with _notion_client(token, databases) as notion_client:
+                bank = notion_client.load_bank()
+        else:
+            bank = GermanBank.read_snapshot(snapshot)
+
+        nouns = bank.nouns
+        verbs = [verb for verb in bank.verbs if verb.fully_conjugated and 'generate' in verb.tags]
+    else:
+        nouns = BANK_NOUNS
+        verbs = BANK_VERBS
+
+    deck = _grammar_deck()
+
+    if batch is not None or all_:
+        nouns, verbs = filter_words(nouns, verbs, tags, [GermanCase(case) for case in cases])
+        space = SentenceSpace.from_words(nouns, verbs, nouns)
+        blank_positions = blank_positions or BLANK_POSITIONS
+        # Sentences are drawn until there are enough distinct questions, as some sentences ask the same question
+        # (e.g. "wir" and "Sie" conjugate alike). Each shard only renders its own slice of the sentences.
+        notes = parallel_sentence_notes(
+            nouns,
+            verbs,
+            sentence_indexes(space, shuffle=batch is not None, seed=seed, shard=shard[0], shard_count=shard[1]),
+            blank_positions,
+            jobs,
+        )
+        limit = None if batch is None else shard_size(batch, *shard)
+
+        with ApkgWriter(output_filename) as writer:
+            writer.add_notes(deck, distinct_notes(notes, limit))
+
+        click.echo(f"Complete! Added {writer.note_count} cards from {len(nouns)} nouns and {len(verbs)} verbs to {output_filename}.")
+        return
+
     added_count = 0
+    rng = random.Random(seed)
 
-    basic_sentence = BasicSentence.make_random(nouns, verbs)
+    basic_sentence = BasicSentence.make_random(nouns, verbs, rng)
 
     # TODO: sometimes add an adjective?
     # TODO: make questions?
     while True:
-        note = basic_sentence.to_anki_note()
+        note = basic_sentence.to_anki_note(rng=rng)
 
         print(f"{note.fields[1]} ({note.fields[3]})")
         print(note.fields[0])
@@ -128,7 +550,7 @@ def generate_sentences(token: str, output_filename: str, online: bool):
 
         def _rotate(basic_sentence: BasicSentence) -> BasicSentence:
             try:
-                res = basic_sentence.rotate()
+                res = basic_sentence.rotate(rng)
                 click.echo("Rotated!")
                 click.echo("")
             except StopIteration:
@@ -136,7 +558,7 @@ def generate_sentences(token: str, output_filename: str, online: bool):
                 click.echo("Rotated! (back to beginning!)")
                 click.echo("")
             except MissingGermanPluralWord:
-                res = BasicSentence.make_random(nouns, verbs)
+                res = BasicSentence.make_random(nouns, verbs, rng)
                 click.echo("No plural! New word!")
                 click.echo("")
             
@@ -151,7 +573,7 @@ def generate_sentences(token: str, output_filename: str, online: bool):
         elif response == 'r' or response == '':
             basic_sentence = _rotate(basic_sentence)
         elif response == 'n':
-            basic_sentence = BasicSentence.make_random(nouns, verbs)
+            basic_sentence = BasicSentence.make_random(nouns, verbs, rng)
             click.echo("New sentence!")
             click.echo("")
 
@@ -160,6 +582,21 @@ def generate_sentences(token: str, output_filename: str, online: bool):
         click.echo(f"Complete! Added {added_count} cards. Now import {output_filename} to Anki, fix any changes, and sync Anki to AnkiCloud.")
 
 
+@cli_group.command()
+@click.option("--output-filename", type=str, default="grammar_output.apkg")
+@click.argument("shard_filenames", nargs=-1, required=True)
+def merge_shards(output_filename: str, shard_filenames: typing.Tuple[str, ...]) -> None:
+    """
+    Merges the packages written by every --shard of a generate-sentences run into one package, taking a note from each
+    shard in turn. Notes asking a question another shard already asked are dropped.
+    """
+    with ApkgWriter(output_filename) as writer:
+        shards = [read_notes(filename, GENANKI_MODELS) for filename in shard_filenames]
+        writer.add_notes(_grammar_deck(), unique_guids(interleave_shards(shards)))
+
+    click.echo(f"Complete! Merged {writer.note_count} cards from {len(shard_filenames)} shards to {output_filename}.")
+
+
 if __name__ == "__main__":
     cli_group.add_command(play)
     cli_group()
@@ -0,0 +1,35 @@
+"""
+Click options shared by the commands that load the bank from Notion.
+"""
+import typing
+
+import click
+
+from sean_learns_german.my_notion_client import NOTION_GERMAN_BANK_DATABASE_ID
+
+
+def parse_database_ids(
+    ctx: click.Context,
+    param: click.Parameter,
+    value: typing.Tuple[str, ...],
+) -> typing.Dict[str, str]:
+    """
+    Maps each database id to the name its items are tagged with (the id itself, unless given as NAME=ID).
+    """
+    if not value:
+        return {NOTION_GERMAN_BANK_DATABASE_ID: NOTION_GERMAN_BANK_DATABASE_ID}
+
+    databases = {}
+    for database in value:
+        name, _, database_id = database.rpartition('=')
+        if not database_id:
+            raise click.BadParameter(f"{database!r} should be a database id, or NAME=ID")
+        databases[database_id] = name or database_id
+
+    return databases
+
+
+DATABASE_ID_HELP = (
+    "Notion database to load the bank from, optionally as NAME=ID. Repeat to merge several databases into one bank, "
+    "tagging each item with source::NAME (or source::ID). Defaults to the German bank."
+)
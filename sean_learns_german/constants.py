@@ -1,17 +1,24 @@
 import enum
+import functools
 import typing
 
 
+@functools.lru_cache(maxsize=None)
+def _enum_members(enum_class: type) -> typing.Tuple[typing.List[enum.Enum], typing.Dict[enum.Enum, int]]:
+    members = list(enum_class)
+    return members, {member: index for index, member in enumerate(members)}
+
+
 class RotateableEnum(enum.Enum):
     def next(self):
-        members = list(self.__class__)
-        index = members.index(self) + 1
+        members, indexes = _enum_members(self.__class__)
+        index = indexes[self] + 1
         if index >= len(members):
             raise StopIteration('end of enumeration reached')
         return members[index]
 
     def first(self):
-        return list(self.__class__)[0]
+        return _enum_members(self.__class__)[0][0]
 
 
 
@@ -89,3 +96,11 @@ class PronounType(str, RotateableEnum):
 class Cardinality(str, RotateableEnum):
     SINGULAR = 'singular'
     PLURAL = 'plural'
+
+
+class GuidSource(str, enum.Enum):
+    """
+    What a bank note's GUID, which Anki matches notes on when importing, is derived from.
+    """
+    GERMAN = "german"
+    NOTION_ID = "notion-id"
@@ -0,0 +1,143 @@
+"""
+Precomputed declension tables, so articles, pronouns and conjugations are single dict lookups.
+
+https://deutsch.lingolia.com/en/grammar/declension
+"""
+import re
+import typing
+
+from sean_learns_german.constants import ArticleType, Cardinality, GermanCase, NounGender, PronounType, SpeechPerspective
+
+
+_CASES = [GermanCase.NOMINATIVE, GermanCase.ACCUSATIVE, GermanCase.DATIVE, GermanCase.GENITIVE]
+_GENDERS_OR_NONE: typing.List[typing.Optional[NounGender]] = [None, *NounGender]
+
+_SINGULAR_ARTICLES = {
+    # nominative, accusative, dative, genitive
+    (ArticleType.DEFINITE, NounGender.MASCULINE): ['der', 'den', 'dem', 'des'],
+    (ArticleType.DEFINITE, NounGender.FEMININE): ['die', 'die', 'der', 'der'],
+    (ArticleType.DEFINITE, NounGender.NEUTER): ['das', 'das', 'dem', 'des'],
+    (ArticleType.INDEFINITE, NounGender.MASCULINE): ['ein', 'einen', 'einem', 'eines'],
+    (ArticleType.INDEFINITE, NounGender.FEMININE): ['eine', 'eine', 'einer', 'einer'],
+    (ArticleType.INDEFINITE, NounGender.NEUTER): ['ein', 'ein', 'einem', 'eines'],
+}
+
+_PLURAL_ARTICLES = {
+    ArticleType.DEFINITE: ['die', 'die', 'den', 'der'],
+    # Indefinite plurals go without an article ("Männer", not "eine Männer").
+    ArticleType.INDEFINITE: [None, None, None, None],
+}
+
+ARTICLES: typing.Dict[typing.Tuple[ArticleType, NounGender, GermanCase, Cardinality], typing.Optional[str]] = {}
+
+for (_article_type, _gender), _articles in _SINGULAR_ARTICLES.items():
+    for _case, _article in zip(_CASES, _articles):
+        ARTICLES[(_article_type, _gender, _case, Cardinality.SINGULAR)] = _article
+
+for _article_type, _articles in _PLURAL_ARTICLES.items():
+    for _gender in NounGender:
+        for _case, _article in zip(_CASES, _articles):
+            ARTICLES[(_article_type, _gender, _case, Cardinality.PLURAL)] = _article
+
+
+
+_VOWEL_GROUPS = re.compile('[aeiouäöüy]+', re.IGNORECASE)
+
+
+def decline_singular(word: str, gender: NounGender, case: GermanCase) -> str:
+    """
+    Add the singular case ending to a noun: masculine and neuter nouns take an -s or -es in the genitive (des Autos,
+    des Mannes), and masculine nouns in -e are weak, with an -n outside the nominative (der Junge, den Jungen).
+    """
+    if gender == NounGender.MASCULINE and word.endswith('e'):
+        return word if case == GermanCase.NOMINATIVE else word + 'n'
+    if case != GermanCase.GENITIVE or gender == NounGender.FEMININE:
+        return word
+    if word.endswith('nis'):
+        # das Ergebnis, des Ergebnisses
+        return word + 'ses'
+    if word.endswith(('s', 'ß', 'x', 'z', 'sch')) or len(_VOWEL_GROUPS.findall(word)) == 1:
+        # des Hauses; one-syllable nouns usually take -es too: des Mannes, des Buches.
+        return word + 'es'
+    return word + 's'
+
+
+# Personal pronouns only depend on gender in the third-person singular.
+_PERSONAL_PRONOUNS = {
+    # nominative, accusative, dative, genitive
+    (SpeechPerspective.FIRST_PERSON, Cardinality.SINGULAR, None): ['ich', 'mich', 'mir', 'meiner'],
+    (SpeechPerspective.SECOND_PERSON, Cardinality.SINGULAR, None): ['du', 'dich', 'dir', 'deiner'],
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.MASCULINE): ['er', 'ihn', 'ihm', 'seiner'],
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.FEMININE): ['sie', 'sie', 'ihr', 'ihrer'],
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.NEUTER): ['es', 'es', 'ihm', 'seiner'],
+    (SpeechPerspective.FIRST_PERSON, Cardinality.PLURAL, None): ['wir', 'uns', 'uns', 'unser'],
+    (SpeechPerspective.SECOND_PERSON, Cardinality.PLURAL, None): ['ihr', 'euch', 'euch', 'euer'],
+    (SpeechPerspective.THIRD_PERSON, Cardinality.PLURAL, None): ['Sie', 'Sie', 'Ihnen', 'Ihrer'],
+}
+
+_PERSONAL_PRONOUNS_ENGLISH = {
+    (SpeechPerspective.FIRST_PERSON, Cardinality.SINGULAR, None): 'I',
+    (SpeechPerspective.SECOND_PERSON, Cardinality.SINGULAR, None): 'you',
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.MASCULINE): 'he',
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.FEMININE): 'she',
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.NEUTER): 'it',
+    (SpeechPerspective.FIRST_PERSON, Cardinality.PLURAL, None): 'we',
+    (SpeechPerspective.SECOND_PERSON, Cardinality.PLURAL, None): 'you',
+    (SpeechPerspective.THIRD_PERSON, Cardinality.PLURAL, None): 'they',
+}
+
+# Possessive determiners are declined like "ein". A `Pronoun` has a single gender, which picks both the ending (the
+# gender of what is possessed) and, in the third-person singular, the stem (sein/ihr).
+_POSSESSIVE_STEMS = {
+    (SpeechPerspective.FIRST_PERSON, Cardinality.SINGULAR, None): ('mein', 'my'),
+    (SpeechPerspective.SECOND_PERSON, Cardinality.SINGULAR, None): ('dein', 'your'),
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.MASCULINE): ('sein', 'his'),
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.FEMININE): ('ihr', 'her'),
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR, NounGender.NEUTER): ('sein', 'its'),
+    (SpeechPerspective.FIRST_PERSON, Cardinality.PLURAL, None): ('unser', 'our'),
+    (SpeechPerspective.SECOND_PERSON, Cardinality.PLURAL, None): ('euer', 'your'),
+    (SpeechPerspective.THIRD_PERSON, Cardinality.PLURAL, None): ('Ihr', 'their'),
+}
+
+_POSSESSIVE_ENDINGS = {
+    NounGender.MASCULINE: ['', 'en', 'em', 'es'],
+    NounGender.FEMININE: ['e', 'e', 'er', 'er'],
+    NounGender.NEUTER: ['', '', 'em', 'es'],
+}
+
+
+def _possessive(stem: str, ending: str) -> str:
+    # "euer" drops its second e when it takes an ending: eure, euren, ...
+    if stem == 'euer' and ending:
+        stem = 'eur'
+    return stem + ending
+
+
+PronounKey = typing.Tuple[PronounType, SpeechPerspective, typing.Optional[NounGender], Cardinality]
+
+PRONOUNS: typing.Dict[typing.Tuple[PronounType, SpeechPerspective, typing.Optional[NounGender], Cardinality, GermanCase], str] = {}
+PRONOUNS_ENGLISH: typing.Dict[PronounKey, str] = {}
+
+for (_perspective, _cardinality, _stem_gender), _pronouns in _PERSONAL_PRONOUNS.items():
+    for _gender in ([_stem_gender] if _stem_gender else _GENDERS_OR_NONE):
+        PRONOUNS_ENGLISH[(PronounType.PERSONAL, _perspective, _gender, _cardinality)] = (
+            _PERSONAL_PRONOUNS_ENGLISH[(_perspective, _cardinality, _stem_gender)]
+        )
+        for _case, _pronoun in zip(_CASES, _pronouns):
+            PRONOUNS[(PronounType.PERSONAL, _perspective, _gender, _cardinality, _case)] = _pronoun
+
+for (_perspective, _cardinality, _stem_gender), (_stem, _english) in _POSSESSIVE_STEMS.items():
+    for _gender in ([_stem_gender] if _stem_gender else NounGender):
+        PRONOUNS_ENGLISH[(PronounType.POSSESSIVE, _perspective, _gender, _cardinality)] = _english
+        for _case, _ending in zip(_CASES, _POSSESSIVE_ENDINGS[_gender]):
+            PRONOUNS[(PronounType.POSSESSIVE, _perspective, _gender, _cardinality, _case)] = _possessive(_stem, _ending)
+
+
+CONJUGATION_FIELDS: typing.Dict[typing.Tuple[SpeechPerspective, Cardinality], str] = {
+    (SpeechPerspective.FIRST_PERSON, Cardinality.SINGULAR): 'conj_ich_1ps',
+    (SpeechPerspective.SECOND_PERSON, Cardinality.SINGULAR): 'conj_du_2ps',
+    (SpeechPerspective.THIRD_PERSON, Cardinality.SINGULAR): 'conj_er_3ps',
+    (SpeechPerspective.FIRST_PERSON, Cardinality.PLURAL): 'conj_wir_1pp',
+    (SpeechPerspective.SECOND_PERSON, Cardinality.PLURAL): 'conj_ihr_2pp',
+    (SpeechPerspective.THIRD_PERSON, Cardinality.PLURAL): 'conj_sie_3pp',
+}
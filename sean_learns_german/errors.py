@@ -1,3 +1,6 @@
+import typing
+
+
 class MissingValue(Exception):
     pass
 
@@ -20,3 +23,10 @@ class MissingPartOfSpeech(MissingValue):
 
 class MissingGermanPluralWord(MissingValue):
     pass
+
+
+class NotionQueryFailed(Exception):
+    def __init__(self, message: str, start_cursor: typing.Optional[str]):
+        super().__init__(message)
+        # Pass this back to resume the query from the last page that was fetched successfully.
+        self.start_cursor = start_cursor
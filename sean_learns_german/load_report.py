@@ -0,0 +1,79 @@
+import collections
+import json
+import logging
+import typing
+
+
+class LoadReport:
+    """
+    Statistics of one load of the bank: how many rows were parsed, how many were skipped and why (by error class), how
+    long fetching and parsing took, and the throughput of each page fetched from Notion. Rows from the local cache
+    aren't fetched, so they're counted as parsed but belong to no page.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.items = 0
+        self.ignored = 0
+        self.incomplete_verbs = 0
+        self.skipped: typing.Counter[str] = collections.Counter()
+        self.parse_seconds = 0.0
+        # (rows, seconds) of each page fetched from Notion, in order.
+        self.pages: typing.List[typing.Tuple[int, float]] = []
+
+    @property
+    def fetch_seconds(self) -> float:
+        return sum(seconds for _, seconds in self.pages)
+
+    @property
+    def fetched_rows(self) -> int:
+        return sum(rows for rows, _ in self.pages)
+
+    def add_page(self, rows: int, seconds: float) -> None:
+        self.pages.append((rows, seconds))
+
+    def add_skipped(self, error: Exception) -> None:
+        self.skipped[type(error).__name__] += 1
+
+    def summary(self) -> str:
+        parts = [f"Loaded {self.items} bank items from {self.rows} rows"]
+        if self.pages:
+            parts.append(f"fetched {self.fetched_rows} rows in {len(self.pages)} pages in {self.fetch_seconds:.1f}s")
+        parts.append(f"parsed in {self.parse_seconds:.2f}s")
+        if self.skipped:
+            parts.append("skipped " + ", ".join(f"{count} {name}" for name, count in sorted(self.skipped.items())))
+        if self.ignored:
+            parts.append(f"ignored {self.ignored} marked 'anki ignore'")
+        if self.incomplete_verbs:
+            parts.append(f"{self.incomplete_verbs} verbs not fully conjugated")
+        return "; ".join(parts)
+
+    def log(self) -> None:
+        """
+        Logs the summary, as a warning if any rows were skipped. Each skipped row is only logged at debug level.
+        """
+        level = logging.WARNING if self.skipped else logging.INFO
+        logging.log(level, "%s", self.summary())
+
+    def to_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'items': self.items,
+            'ignored': self.ignored,
+            'incomplete_verbs': self.incomplete_verbs,
+            'skipped': dict(sorted(self.skipped.items())),
+            'parse_seconds': self.parse_seconds,
+            'fetch_seconds': self.fetch_seconds,
+            'pages': [
+                {
+                    'rows': rows,
+                    'seconds': seconds,
+                    'rows_per_second': rows / seconds if seconds else None,
+                }
+                for rows, seconds in self.pages
+            ],
+        }
+
+    def write(self, filename: str) -> None:
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+import typing
+
+import genanki
+
+
+MANIFEST_VERSION = 1
+
+
+def manifest_filename_for(output_filename: str) -> str:
+    return f"{output_filename}.manifest.json"
+
+
+def note_content_hash(note: genanki.Note) -> str:
+    """
+    Changes whenever anything Anki imports from the note does: its model, fields or tags.
+    """
+    content = '\x1f'.join([str(note.model.model_id), *note.fields, ' '.join(note.tags)])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class DeckManifest:
+    """
+    What an export contained: each note's GUID, mapped to the hash of its content and its first field (so a report can
+    say which note it was). Comparing against the previous export's manifest tells which notes are new, changed or
+    deleted.
+    """
+
+    def __init__(self, notes: typing.Optional[typing.Dict[str, typing.Tuple[str, str]]] = None):
+        self.notes = notes if notes is not None else {}
+
+    def __len__(self) -> int:
+        return len(self.notes)
+
+    def __contains__(self, guid: str) -> bool:
+        return guid in self.notes
+
+    def add(self, note: genanki.Note) -> str:
+        """
+        Records a note, and returns its content hash.
+        """
+        content_hash = note_content_hash(note)
+        self.record(note.guid, content_hash, note.fields[0])
+        return content_hash
+
+    def record(self, guid: str, content_hash: str, first_field: str) -> None:
+        self.notes[guid] = (content_hash, first_field)
+
+    def has_unchanged(self, guid: str, content_hash: str) -> bool:
+        return guid in self.notes and self.notes[guid][0] == content_hash
+
+    def deleted_since(self, previous: 'DeckManifest') -> typing.List[typing.Tuple[str, str]]:
+        """
+        The (GUID, first field) of the notes in `previous` that are gone from this manifest.
+        """
+        return [
+            (guid, first_field)
+            for guid, (_, first_field) in previous.notes.items()
+            if guid not in self.notes
+        ]
+
+    def write(self, filename: str) -> None:
+        with open(filename, 'w') as f:
+            json.dump(
+                {
+                    'version': MANIFEST_VERSION,
+                    'notes': {
+                        guid: {'hash': content_hash, 'first_field': first_field}
+                        for guid, (content_hash, first_field) in self.notes.items()
+                    },
+                },
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def read(cls, filename: str) -> 'DeckManifest':
+        """
+        Reads a manifest, or returns an empty one if there's no previous export.
+        """
+        if not os.path.exists(filename):
+            return cls()
+
+        with open(filename) as f:
+            manifest = json.load(f)
+
+        if manifest.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported manifest version {manifest.get('version')} in {filename}")
+
+        return cls({
+            guid: (note['hash'], note['first_field'])
+            for guid, note in manifest['notes'].items()
+        })
@@ -1,4 +1,5 @@
 import dataclasses
+import functools
 import logging
 import random
 import typing
@@ -8,30 +9,116 @@ from sean_learns_german.models.genanki_models import GermanNote, GENANKI_GRAMMAR
 from sean_learns_german.models.german_models import BankNoun, Verb, Noun, Pronoun, Verb
 
 
+BLANK_POSITIONS = ('subject', 'verb', 'object')
+# How many sentences' renderings render_sentence keeps.
+RENDER_CACHE_SIZE = 4096
+
+
 def _sentence_format(s: str) -> str:
     return s[0].upper() + s[1:]
 
 
-@dataclasses.dataclass
+class RenderedSentence:
+    """
+    The texts of a sentence: its answer and its English gloss, and its question with each position blanked out. The
+    subject, verb and object are declined and conjugated once and shared by all of them (or passed in, when the caller
+    keeps them per word); each question is only built the first time it's asked for, so rendering a single blank costs
+    no more than it used to.
+    """
+    __slots__ = (
+        'subject', 'verb', 'object_', 'subject_str', 'verb_str', 'object_str', 'answer', 'english', '_questions',
+    )
+
+    def __init__(
+        self,
+        basic_sentence: 'BasicSentence',
+        subject_str: typing.Optional[str] = None,
+        verb_str: typing.Optional[str] = None,
+        object_str: typing.Optional[str] = None,
+    ):
+        self.subject = basic_sentence.subject
+        self.verb = basic_sentence.verb
+        self.object_ = basic_sentence.object_
+
+        if subject_str is None:
+            subject_str = self.subject.make_str(case=GermanCase.NOMINATIVE)
+        if verb_str is None:
+            verb_str = self.verb.conjugate(self.subject.perspective, self.subject.cardinality)
+        if object_str is None:
+            object_str = self.object_.make_str(case=self.verb.requires_case)
+
+        self.subject_str = subject_str
+        self.verb_str = verb_str
+        self.object_str = object_str
+
+        self.answer = _sentence_format(f"{self.subject_str} {self.verb_str} {self.object_str}")
+        self.english = (
+            f"{self.subject.make_english_str()} + "
+            f"{self.verb.make_english_str()} + "
+            f"{self.object_.make_english_str()}"
+        )
+        self._questions: typing.Dict[str, str] = {}
+
+    def question(self, blank_it: str) -> str:
+        question = self._questions.get(blank_it)
+        if question is None:
+            question = self._questions[blank_it] = self._make_question(blank_it)
+        return question
+
+    def _make_question(self, blank_it: str) -> str:
+        if blank_it == 'subject':
+            return _sentence_format(
+                f"____ ({self.subject.make_hint(case=GermanCase.NOMINATIVE)}) {self.verb_str} {self.object_str}"
+            )
+        elif blank_it == 'verb':
+            return _sentence_format(f"{self.subject_str} ____ ({self.verb.german_word}) {self.object_str}")
+        elif blank_it == 'object':
+            return _sentence_format(
+                f"{self.subject_str} {self.verb_str} ____ ({self.object_.make_hint(case=self.verb.requires_case)})"
+            )
+        else:
+            raise ValueError(blank_it)
+
+
+@functools.lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_sentence(basic_sentence: 'BasicSentence') -> RenderedSentence:
+    """
+    The rendering of a sentence, kept for the sentences rendered most recently: generating notes renders each sentence
+    once per blank position, and `play` re-renders the same few sentences on every selection.
+    """
+    return RenderedSentence(basic_sentence)
+
+
+@dataclasses.dataclass(unsafe_hash=True)
 class BasicSentence:
+    """
+    Hashable, so that its rendering can be cached by its subject, verb and object.
+    """
+    __slots__ = ('subject', 'verb', 'object_')
+
     subject: typing.Union[Noun, Pronoun]
     verb: Verb
     object_: Noun
 
     @classmethod
-    def make_random(cls, nouns: typing.List[BankNoun], verbs: typing.List[Verb]) -> 'BasicSentence':
+    def make_random(
+        cls,
+        nouns: typing.List[BankNoun],
+        verbs: typing.List[Verb],
+        rng: random.Random = random,
+    ) -> 'BasicSentence':
         # https://iwillteachyoualanguage.com/learn/german/german-tips/german-cases-explained
-        subject_is_pronoun = random.choice([False, True])
+        subject_is_pronoun = rng.choice([False, True])
 
         if subject_is_pronoun:
-            subject = Pronoun.random()
+            subject = Pronoun.random(rng)
         else:
-            subject = random.choice(nouns).random_noun()
+            subject = rng.choice(nouns).random_noun(rng)
 
         return cls(
             subject=subject,
-            verb=random.choice(verbs),
-            object_=random.choice(nouns).random_noun(),
+            verb=rng.choice(verbs),
+            object_=rng.choice(nouns).random_noun(rng),
         )
     
     def first(self) -> 'BasicSentence':
@@ -41,15 +128,15 @@ class BasicSentence:
             object_=self.object_.first(),
         )
 
-    def rotate(self) -> 'BasicSentence':
+    def rotate(self, rng: random.Random = random) -> 'BasicSentence':
         rotated_object = self.object_
 
         try:
-            rotated_subject = self.subject.rotate()
+            rotated_subject = self.subject.rotate(rng)
         except StopIteration:
             rotated_subject = self.subject.first()
             try:
-                rotated_object = self.object_.rotate()
+                rotated_object = self.object_.rotate(rng)
             except:
                 raise
 
@@ -59,59 +146,28 @@ class BasicSentence:
             object_=rotated_object,
         )
 
+    def render(self) -> RenderedSentence:
+        return render_sentence(self)
+
     def get_question_sentence(self, blank_it: str) -> str:
-        if blank_it == 'subject':
-            return _sentence_format(
-                "____ "
-                f"({self.subject.make_hint(case=GermanCase.NOMINATIVE)}) "
-                f"{self.verb.conjugate(self.subject.perspective, self.subject.cardinality)} "
-                f"{self.object_.make_str(case=self.verb.requires_case)}"
-            )
-        elif blank_it == 'verb':
-            return _sentence_format(
-                f"{self.subject.make_str(case=GermanCase.NOMINATIVE)} "
-                "____ "
-                f"({self.verb.german_word}) "
-                f"{self.object_.make_str(case=self.verb.requires_case)}"
-            )
-        elif blank_it == 'object':
-            return _sentence_format(
-                f"{self.subject.make_str(case=GermanCase.NOMINATIVE)} "
-                f"{self.verb.conjugate(self.subject.perspective, self.subject.cardinality)} "
-                f"____ "
-                f"({self.object_.make_hint(case=self.verb.requires_case)})"
-            )
-        else:
-            raise ValueError(blank_it)
+        return self.render().question(blank_it)
 
     def get_answer_sentence(self) -> str:
-        return _sentence_format(
-            f"{self.subject.make_str(case=GermanCase.NOMINATIVE)} "
-            f"{self.verb.conjugate(self.subject.perspective, self.subject.cardinality)} "
-            f"{self.object_.make_str(case=self.verb.requires_case)}"
-        )
-
-    def to_anki_note(self, blank_it: typing.Optional[str]) -> GermanNote:
-        answer_sentence = self.get_answer_sentence()
-
-        english_answer_sentence = (
-            f"{self.subject.make_english_str()} + "
-            f"{self.verb.make_english_str()} + "
-            f"{self.object_.make_english_str()}"
-        )
+        return self.render().answer
 
+    def to_anki_note(self, blank_it: typing.Optional[str] = None, rng: random.Random = random) -> GermanNote:
         if not blank_it:
             logging.warning("Random blank_it chosen!")
-            blank_it = random.choice(['subject', 'verb', 'object'])
+            blank_it = rng.choice(BLANK_POSITIONS)
 
-        question_sentence = self.get_question_sentence(blank_it)
+        rendered = self.render()
 
         return GermanNote(
             model=GENANKI_GRAMMAR_MODEL_V2,
             fields=[
-                _sentence_format(question_sentence),
-                _sentence_format(answer_sentence),
-                english_answer_sentence,
+                rendered.question(blank_it),
+                rendered.answer,
+                rendered.english,
                 "BasicSentence",
             ],
             tags=["BasicSentence"],
@@ -1,28 +1,68 @@
+import functools
 import logging
 import typing
 
 import genanki
 
-from sean_learns_german.constants import PartsOfSpeech
+from sean_learns_german.apkg_writer import NoteRow
+from sean_learns_german.bank_lint import german_text
+from sean_learns_german.constants import GuidSource, PartsOfSpeech
+from sean_learns_german.manifest import note_content_hash
 from sean_learns_german.models.german_models import BankNoun, BankVocabulary, BankWord, Phrase, Verb
+from sean_learns_german.pipeline import parallel_map
+from sean_learns_german.synonyms import SynonymGroup
+
+
+class BuiltNote(typing.NamedTuple):
+    """
+    A note ready to go into the package and the manifest. It's plain data, so notes built in worker processes reach
+    the parent ready to write, rather than as notes to rebuild.
+    """
+    row: NoteRow
+    content_hash: str
+
+    @classmethod
+    def from_note(cls, note: genanki.Note) -> 'BuiltNote':
+        return cls(NoteRow.from_note(note), note_content_hash(note))
+
+    @property
+    def guid(self) -> str:
+        return self.row.guid
 
 
 class GermanNote(genanki.Note):
     @property
     def guid(self):
-        return genanki.guid_for(self.fields[0])
+        # genanki reads the GUID while writing, so it's computed once: when the note is built, or failing that from
+        # the first field on first use.
+        if self._guid is None:
+            self._guid = genanki.guid_for(self.fields[0])
+        return self._guid
+
+    @guid.setter
+    def guid(self, guid: typing.Optional[str]):
+        self._guid = guid
 
     @classmethod
-    def from_german_model(cls, german_model: typing.Union[BankWord, Phrase]) -> 'GermanNote':
+    def from_german_model(
+        cls,
+        german_model: typing.Union[BankWord, Phrase, SynonymGroup],
+        guid_source: GuidSource = GuidSource.GERMAN,
+    ) -> 'GermanNote':
+        """
+        The GUID is computed here, once. With `GuidSource.NOTION_ID` it comes from the Notion page, so editing the
+        German in Notion updates the note instead of orphaning its review history. Items that didn't come from Notion
+        fall back to the German.
+        """
         try:
             if isinstance(german_model, Verb):
-                return cls(
+                note = cls(
                     model=GENANKI_VERB_MODEL,
                     fields=[
                         german_model.german_word,
                         german_model.english_word,
                         german_model.english_synonyms,
-                        PartsOfSpeech.VERB,
+                        PartsOfSpeech.VERB.value,
                         german_model.conj_ich_1ps,
                         german_model.conj_du_2ps,
                         german_model.conj_er_3ps,
@@ -30,22 +70,22 @@ class GermanNote(genanki.Note):
                         german_model.conj_ihr_2pp,
                         german_model.conj_sie_3pp,
                     ],
-                    tags=[PartsOfSpeech.VERB] + german_model.tags,
+                    tags=[PartsOfSpeech.VERB.value, *german_model.tags],
                 )
             elif isinstance(german_model, BankNoun):
-                return GermanNote(
+                note = cls(
                     model=GENANKI_NOUN_MODEL,
                     fields=[
                         german_model.german_word_singular,
                         german_model.english_word,
                         german_model.english_synonyms,
-                        PartsOfSpeech.NOUN,
-                        german_model.gender,
+                        PartsOfSpeech.NOUN.value,
+                        german_model.gender.value,
                     ],
-                    tags=[PartsOfSpeech.NOUN] + german_model.tags,
+                    tags=[PartsOfSpeech.NOUN.value, *german_model.tags],
                 )
             elif isinstance(german_model, BankVocabulary):
-                return GermanNote(
+                note = cls(
                     model=GENANKI_VOCABULARY_MODEL,
                     fields=[
                         german_model.german,
@@ -53,24 +93,74 @@ class GermanNote(genanki.Note):
                         german_model.english_synonyms,
                         german_model.part_of_speech,
                     ],
-                    tags=[german_model.part_of_speech] + german_model.tags,
+                    tags=[german_model.part_of_speech, *german_model.tags],
+                )
+            elif isinstance(german_model, SynonymGroup):
+                english_word, *english_synonyms = german_model.english_meanings()
+                note = cls(
+                    model=GENANKI_SYNONYM_MODEL,
+                    fields=[
+                        "<br />".join(german_model.german_answers()),
+                        english_word,
+                        ", ".join(english_synonyms),
+                        german_model.part_of_speech,
+                    ],
+                    tags=[german_model.part_of_speech, "synonyms", *dict.fromkeys(
+                        tag for bank_word in german_model.bank_words for tag in bank_word.tags
+                    )],
                 )
             elif isinstance(german_model, Phrase):
-                return GermanNote(
+                note = cls(
                     model=GENANKI_PHRASE_MODEL,
                     fields=[
                         german_model.german,
                         german_model.english,
                     ],
-                    tags=german_model.tags,
+                    tags=list(german_model.tags),
                 )
             else:
                 raise ValueError(f"Unexpected model of type {german_model.__class__.__name__}")
+
+            # A synonym group's note takes over its first word's GUID, so adding or removing a synonym, or turning
+            # --merge-synonyms on or off, keeps that note's review history.
+            guid_model = german_model.bank_words[0] if isinstance(german_model, SynonymGroup) else german_model
+            if guid_source == GuidSource.NOTION_ID and guid_model.notion_id:
+                note.guid = genanki.guid_for(guid_model.notion_id)
+            else:
+                note.guid = genanki.guid_for(german_text(guid_model))
+
+            return note
         except:
-            logging.error('Could not create a note from %s', german_model.german)
+            logging.error('Could not create a note from %s', german_model)
             raise
 
 
+def _build_notes(
+    german_models: typing.List[typing.Union[BankWord, Phrase]],
+    guid_source: GuidSource = GuidSource.GERMAN,
+) -> typing.List[BuiltNote]:
+    return [BuiltNote.from_note(GermanNote.from_german_model(german_model, guid_source)) for german_model in german_models]
+
+
+def build_notes(
+    german_models: typing.Iterable[typing.Union[BankWord, Phrase]],
+    jobs: int = 1,
+    chunk_size: int = 1000,
+    guid_source: GuidSource = GuidSource.GERMAN,
+) -> typing.Generator[typing.Tuple[typing.Union[BankWord, Phrase], BuiltNote], None, None]:
+    """
+    Yields each bank item with its built note, in order. With more than one job, the notes are built in a process
+    pool, in chunks of `chunk_size` items, and the parent only writes them.
+    """
+    if jobs <= 1:
+        for german_model in german_models:
+            yield german_model, BuiltNote.from_note(GermanNote.from_german_model(german_model, guid_source))
+        return
+
+    build = functools.partial(_build_notes, guid_source=guid_source)
+    yield from parallel_map(build, german_models, jobs, chunk_size)
+
+
 GENANKI_CSS = """.card {
   font-family: arial;
   font-size: 20px;
@@ -198,6 +288,38 @@ GENANKI_PHRASE_MODEL = genanki.Model(
 )
 
 
+# One note per group of words sharing an English meaning, answering with every German word of the group.
+GENANKI_SYNONYM_MODEL = genanki.Model(
+    model_id=1731596482,  # hard coded
+    name="German Synonyms Model",
+    fields=[
+        {"name": "German"},
+        {"name": "English"},
+        {"name": "EnglishSynonyms"},
+        {"name": "PartOfSpeech"},
+    ],
+    templates=[
+        {
+            "name": "English -> German",
+            "qfmt": (
+                "{{English}} ({{PartOfSpeech}})"
+                "{{#EnglishSynonyms}} <i>[{{EnglishSynonyms}}]</i>{{/EnglishSynonyms}}"
+            ),
+            "afmt": '{{FrontSide}}<hr id="answer">{{German}}',
+        },
+        {
+            "name": "German -> English",
+            "qfmt": "{{German}}",
+            "afmt": (
+                '{{FrontSide}}<hr id="answer">{{English}} ({{PartOfSpeech}})'
+                "{{#EnglishSynonyms}} <i>[{{EnglishSynonyms}}]</i>{{/EnglishSynonyms}}"
+            ),
+        },
+    ],
+    css=GENANKI_CSS,
+)
+
+
 GENANKI_GRAMMAR_MODEL_V2 = genanki.Model(
     model_id=7049888,  # hard coded
     name="German Grammar Model v2",
@@ -216,3 +338,16 @@ GENANKI_GRAMMAR_MODEL_V2 = genanki.Model(
     ],
     css=GENANKI_CSS,
 )
+
+
+GENANKI_MODELS = {
+    model.model_id: model
+    for model in [
+        GENANKI_VOCABULARY_MODEL,
+        GENANKI_NOUN_MODEL,
+        GENANKI_VERB_MODEL,
+        GENANKI_PHRASE_MODEL,
+        GENANKI_SYNONYM_MODEL,
+        GENANKI_GRAMMAR_MODEL_V2,
+    ]
+}
@@ -3,35 +3,58 @@ import logging
 import random
 import typing
 
-import enforce_typing
-
 from sean_learns_german.constants import ArticleType, Cardinality, GermanCase, NounGender, PronounType, SpeechPerspective, PartsOfSpeech
+from sean_learns_german.declension import ARTICLES, CONJUGATION_FIELDS, PRONOUNS, PRONOUNS_ENGLISH, decline_singular
 from sean_learns_german.errors import MissingGender, MissingGermanPluralWord
+from sean_learns_german.models.validation import checked_types
+
+
+# `Pronoun.random` shadows the random module inside its class body, so the RNG parameters use these names instead.
+Rng = random.Random
+DEFAULT_RNG = random
 
 
-@dataclasses.dataclass
+# Models are slotted and hashed by value: they're small, created in bulk (especially `Noun`s while rotating sentences),
+# and used to key caches, so treat them as immutable. They aren't `frozen=True` because that makes `__init__` about
+# three times slower. Field types are checked once, where the bank is parsed, via `validate_types`.
+
+
+@dataclasses.dataclass(unsafe_hash=True)
 class Phrase:
+    __slots__ = ('german', 'english', 'tags', 'notion_id')
+
     german: str
     english: str
-    tags: typing.List[str]
+    tags: typing.Tuple[str, ...]
+    # The id of the Notion page the item came from, if it came from Notion.
+    notion_id: typing.Optional[str]
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(unsafe_hash=True)
 class BankWord:
-    tags: typing.List[str]
+    __slots__ = ('tags', 'notion_id')
 
+    tags: typing.Tuple[str, ...]
+    # The id of the Notion page the word came from, if it came from Notion.
+    notion_id: typing.Optional[str]
 
-@dataclasses.dataclass
+
+@dataclasses.dataclass(unsafe_hash=True)
 class BankVocabulary(BankWord):
+    __slots__ = ('german', 'english_word', 'english_synonyms', 'part_of_speech')
+
     german: str
     english_word: str
     english_synonyms: str
-    part_of_speech: PartsOfSpeech
+    # The raw Notion value, which isn't limited to `PartsOfSpeech`.
+    part_of_speech: str
 
 
-@enforce_typing.enforce_types
-@dataclasses.dataclass
+@checked_types
+@dataclasses.dataclass(unsafe_hash=True)
 class BankNoun(BankWord):
+    __slots__ = ('german_word_singular', 'german_word_plural', 'english_word', 'english_synonyms', 'gender')
+
     german_word_singular: str
     german_word_plural: typing.Optional[str]
     english_word: str
@@ -42,8 +65,8 @@ class BankNoun(BankWord):
         if not self.gender:
             raise MissingGender()
 
-    def random_noun(self) -> 'Noun':
-        random_article_type = random.choice([article_type for article_type in list(ArticleType)])
+    def random_noun(self, rng: Rng = DEFAULT_RNG) -> 'Noun':
+        random_article_type = rng.choice([article_type for article_type in list(ArticleType)])
 
         return Noun(
             article_type=random_article_type,
@@ -55,6 +78,7 @@ class BankNoun(BankWord):
             perspective=SpeechPerspective.THIRD_PERSON,
             cardinality=Cardinality.SINGULAR,
             tags=self.tags,
+            notion_id=self.notion_id,
         )
 
     def __lt__(self, o):
@@ -62,8 +86,10 @@ class BankNoun(BankWord):
 
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(unsafe_hash=True)
 class Noun(BankNoun):
+    __slots__ = ('article_type', 'perspective', 'cardinality')
+
     article_type: ArticleType
     perspective: SpeechPerspective
     cardinality: Cardinality
@@ -84,10 +110,12 @@ class Noun(BankNoun):
             perspective=self.perspective,
             cardinality=self.cardinality.first(),
             tags=self.tags,
+            notion_id=self.notion_id,
         )
 
-    def rotate(self) -> 'Noun':
+    def rotate(self, rng: Rng = DEFAULT_RNG) -> 'Noun':
         # Rotate: article_type, cardinality
+        del rng
         rotated_cardinality = self.cardinality
 
         try:
@@ -110,47 +138,27 @@ class Noun(BankNoun):
                 perspective=self.perspective,
                 cardinality=rotated_cardinality,
                 tags=self.tags,
+                notion_id=self.notion_id,
             )
         except MissingGermanPluralWord as e:
             raise StopIteration() from e
 
     def get_article(self, case: GermanCase) -> typing.Optional[str]:
-        if self.cardinality == Cardinality.PLURAL:
-            if case == GermanCase.NOMINATIVE or case == GermanCase.ACCUSATIVE:
-                if self.article_type == ArticleType.DEFINITE:
-                    return 'die'
-                elif self.article_type == ArticleType.INDEFINITE:
-                    return None
-        elif self.cardinality == Cardinality.SINGULAR:
-            if self.article_type == ArticleType.DEFINITE:
-                if self.gender == NounGender.MASCULINE:
-                    if case == GermanCase.NOMINATIVE:
-                        return 'der'
-                    elif case == GermanCase.ACCUSATIVE:
-                        return 'den'
-                elif self.gender == NounGender.FEMININE:
-                    return 'die'
-                elif self.gender == NounGender.NEUTER:
-                    return 'das'
-            elif self.article_type == ArticleType.INDEFINITE:
-                if self.gender == NounGender.MASCULINE:
-                    if case == GermanCase.NOMINATIVE:
-                        return 'ein'
-                    elif case == GermanCase.ACCUSATIVE:
-                        return 'einen'
-                elif self.gender == NounGender.FEMININE:
-                    return 'eine'
-                elif self.gender == NounGender.NEUTER:
-                    return 'ein'
-        raise ValueError(f"Unexpected article type, gender, case, and/or cardinality: {self.article_type}, {self.gender}, {case}, {self.cardinality}")
+        try:
+            return ARTICLES[(self.article_type, self.gender, case, self.cardinality)]
+        except KeyError:
+            raise ValueError(f"Unexpected article type, gender, case, and/or cardinality: {self.article_type}, {self.gender}, {case}, {self.cardinality}")
 
     def make_str(self, case: GermanCase) -> str:
         article = self.get_article(case)
-        
+
         if self.cardinality == Cardinality.SINGULAR:
-            word = self.german_word_singular
+            word = decline_singular(self.german_word_singular, self.gender, case)
         elif self.cardinality == Cardinality.PLURAL:
             word = self.german_word_plural
+            # Dative plurals take an -n, unless they already end in -n or -s (den Männern, den Frauen, den Autos).
+            if case == GermanCase.DATIVE and not word.endswith(('n', 's')):
+                word += 'n'
 
         if article:
             return f"{article} {word}"
@@ -164,8 +172,10 @@ class Noun(BankNoun):
         return f"{self.english_word}, {self.article_type} {self.cardinality}"
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(unsafe_hash=True)
 class Pronoun:
+    __slots__ = ('pronoun_type', 'perspective', 'gender', 'cardinality')
+
     pronoun_type: PronounType
     perspective: SpeechPerspective
     gender: typing.Optional[NounGender]
@@ -176,12 +186,12 @@ class Pronoun:
             raise ValueError("Gender cannot be None with a third-person singular pronoun")
 
     @classmethod
-    def random(cls) -> 'Pronoun':
-        random_perspective = random.choice([perspective for perspective in list(SpeechPerspective)])
-        random_cardinality = random.choice([cardinality for cardinality in list(Cardinality)])
+    def random(cls, rng: Rng = DEFAULT_RNG) -> 'Pronoun':
+        random_perspective = rng.choice([perspective for perspective in list(SpeechPerspective)])
+        random_cardinality = rng.choice([cardinality for cardinality in list(Cardinality)])
 
         if random_perspective == SpeechPerspective.THIRD_PERSON and random_cardinality == Cardinality.SINGULAR:
-            random_gender_or_none = random.choice([gender for gender in list(NounGender)])
+            random_gender_or_none = rng.choice([gender for gender in list(NounGender)])
         else:
             random_gender_or_none = None
 
@@ -200,7 +210,7 @@ class Pronoun:
             gender=self.gender,
         )
 
-    def rotate(self) -> 'Pronoun':
+    def rotate(self, rng: Rng = DEFAULT_RNG) -> 'Pronoun':
         rotated_cardinality = self.cardinality
         rotated_pronoun_type = self.pronoun_type
 
@@ -219,7 +229,7 @@ class Pronoun:
                 #     raise
 
         if rotated_speech_perspective == SpeechPerspective.THIRD_PERSON and rotated_cardinality == Cardinality.SINGULAR:
-            rotated_gender = random.choice([noun_gender for noun_gender in list(NounGender)])
+            rotated_gender = rng.choice([noun_gender for noun_gender in list(NounGender)])
         else:
             rotated_gender = None
 
@@ -230,69 +240,20 @@ class Pronoun:
             gender=rotated_gender,
         )
 
-    def get_pronoun(self) -> str:
-        # https://deutsch.lingolia.com/en/grammar/declension/nominative
-        if self.pronoun_type == PronounType.PERSONAL:
-            if self.perspective == SpeechPerspective.FIRST_PERSON and self.cardinality == Cardinality.SINGULAR:
-                return 'ich'
-            elif self.perspective == SpeechPerspective.SECOND_PERSON and self.cardinality == Cardinality.SINGULAR:
-                return 'du'
-            elif self.perspective == SpeechPerspective.THIRD_PERSON and self.cardinality == Cardinality.SINGULAR:
-                if self.gender == NounGender.MASCULINE:
-                    return 'er'
-                elif self.gender == NounGender.FEMININE:
-                    return 'sie'
-                elif self.gender == NounGender.NEUTER:
-                    return 'es'
-            elif self.perspective == SpeechPerspective.FIRST_PERSON and self.cardinality == Cardinality.PLURAL:
-                return 'wir'
-            elif self.perspective == SpeechPerspective.SECOND_PERSON and self.cardinality == Cardinality.PLURAL:
-                return 'ihr'
-            elif self.perspective == SpeechPerspective.THIRD_PERSON and self.cardinality == Cardinality.PLURAL:
-                return 'Sie'
-        elif self.pronoun_type == PronounType.POSSESSIVE:
-            if self.perspective == SpeechPerspective.FIRST_PERSON and self.cardinality == Cardinality.SINGULAR:
-                if self.gender == NounGender.FEMININE:
-                    return 'meine'
-                elif self.gender in [NounGender.MASCULINE, NounGender.NEUTER]:
-                    return 'mein'
-            elif self.perspective == SpeechPerspective.SECOND_PERSON and self.cardinality == Cardinality.SINGULAR:
-                if self.gender == NounGender.FEMININE:
-                    return 'deine'
-                elif self.gender in [NounGender.MASCULINE, NounGender.NEUTER]:
-                    return 'dein'
-            elif self.perspective == SpeechPerspective.SECOND_PERSON and self.cardinality == Cardinality.SINGULAR:
-                if self.gender == NounGender.FEMININE:
-                    return 'deine'
-                if self.gender in [NounGender.MASCULINE, NounGender.NEUTER]:
-                    return 'dein'
-            # TODO: incomplete?
-        raise ValueError(f"Unexpected pronoun type, perspective, and/or gender: {self.pronoun_type}, {self.perspective}, {self.gender}")
+    def get_pronoun(self, case: GermanCase = GermanCase.NOMINATIVE) -> str:
+        try:
+            return PRONOUNS[(self.pronoun_type, self.perspective, self.gender, self.cardinality, case)]
+        except KeyError:
+            raise ValueError(f"Unexpected pronoun type, perspective, and/or gender: {self.pronoun_type}, {self.perspective}, {self.gender}")
 
     def make_str(self, case: GermanCase) -> str:
-        del case
-        return f"{self.get_pronoun()}"
+        return self.get_pronoun(case)
 
     def make_english_str(self) -> str:
-        if self.pronoun_type == PronounType.PERSONAL:
-            if self.perspective == SpeechPerspective.FIRST_PERSON and self.cardinality == Cardinality.SINGULAR:
-                return 'I'
-            elif self.perspective == SpeechPerspective.SECOND_PERSON and self.cardinality == Cardinality.SINGULAR:
-                return 'you'
-            elif self.perspective == SpeechPerspective.THIRD_PERSON and self.cardinality == Cardinality.SINGULAR:
-                if self.gender == NounGender.MASCULINE:
-                    return 'he'
-                elif self.gender == NounGender.FEMININE:
-                    return 'she'
-                elif self.gender == NounGender.NEUTER:
-                    return 'it'
-            elif self.perspective == SpeechPerspective.FIRST_PERSON and self.cardinality == Cardinality.PLURAL:
-                return 'we'
-            elif self.perspective == SpeechPerspective.SECOND_PERSON and self.cardinality == Cardinality.PLURAL:
-                return 'you'
-            elif self.perspective == SpeechPerspective.THIRD_PERSON and self.cardinality == Cardinality.PLURAL:
-                return 'they'
-        raise ValueError()
+        try:
+            return PRONOUNS_ENGLISH[(self.pronoun_type, self.perspective, self.gender, self.cardinality)]
+        except KeyError:
+            raise ValueError(f"Unexpected pronoun type, perspective, and/or gender: {self.pronoun_type}, {self.perspective}, {self.gender}")
 
     def make_hint(self, case: GermanCase) -> typing.Optional[str]:
         del case
@@ -302,9 +263,22 @@ class Pronoun:
             return None
 
 
-@enforce_typing.enforce_types
-@dataclasses.dataclass
+@checked_types
+@dataclasses.dataclass(unsafe_hash=True)
 class Verb(BankWord):
+    __slots__ = (
+        'german_word',
+        'english_word',
+        'english_synonyms',
+        'conj_ich_1ps',
+        'conj_du_2ps',
+        'conj_er_3ps',
+        'conj_wir_1pp',
+        'conj_ihr_2pp',
+        'conj_sie_3pp',
+        'requires_case',
+    )
+
     german_word: str
     english_word: str
     english_synonyms: typing.Optional[str]
@@ -318,33 +292,27 @@ class Verb(BankWord):
 
     def __post_init__(self):
         if self.requires_case is None:
-            logging.info("Verb %s is missing requires_case, assuming accusative", self.german_word)
+            logging.debug("Verb %s is missing requires_case, assuming accusative", self.german_word)
             self.requires_case = GermanCase.ACCUSATIVE
         
-        if not all([
+        if not self.fully_conjugated:
+            logging.debug("Verb %s is not fully conjugated", self.german_word)
+
+    @property
+    def fully_conjugated(self) -> bool:
+        return all([
             self.conj_ich_1ps,
             self.conj_du_2ps,
             self.conj_er_3ps,
             self.conj_wir_1pp,
             self.conj_ihr_2pp,
             self.conj_sie_3pp,
-        ]):
-            logging.warning("Verb %s is not fully conjugated", self.german_word)
+        ])
 
     def conjugate(self, perspective: SpeechPerspective, cardinality: Cardinality):
-        if perspective == SpeechPerspective.FIRST_PERSON and cardinality == Cardinality.SINGULAR:
-            return self.conj_ich_1ps
-        elif perspective == SpeechPerspective.SECOND_PERSON and cardinality == Cardinality.SINGULAR:
-            return self.conj_du_2ps
-        elif perspective == SpeechPerspective.THIRD_PERSON and cardinality == Cardinality.SINGULAR:
-            return self.conj_er_3ps
-        elif perspective == SpeechPerspective.FIRST_PERSON and cardinality == Cardinality.PLURAL:
-            return self.conj_wir_1pp
-        elif perspective == SpeechPerspective.SECOND_PERSON and cardinality == Cardinality.PLURAL:
-            return self.conj_ihr_2pp
-        elif perspective == SpeechPerspective.THIRD_PERSON and cardinality == Cardinality.PLURAL:
-            return self.conj_sie_3pp
-        else:
+        try:
+            return getattr(self, CONJUGATION_FIELDS[(perspective, cardinality)])
+        except KeyError:
             raise ValueError(perspective)
 
     def make_english_str(self) -> str:
@@ -0,0 +1,54 @@
+import dataclasses
+import functools
+import typing
+
+
+_CHECKED_MODELS: typing.Set[type] = set()
+
+
+def checked_types(cls: type) -> type:
+    """
+    Marks a dataclass whose field types `validate_types` should check. Unlike enforce_typing, nothing happens on
+    construction: models built from already-validated ones (e.g. `Noun`s rotated from a `BankNoun`) pay nothing.
+    """
+    _CHECKED_MODELS.add(cls)
+    return cls
+
+
+def _allowed_types(hint: typing.Any) -> typing.Tuple[type, ...]:
+    origin = typing.get_origin(hint)
+
+    if origin is typing.Union:
+        return tuple(allowed for arg in typing.get_args(hint) for allowed in _allowed_types(arg))
+    elif origin is not None:
+        return (origin,)
+    elif hint is typing.Any:
+        return (object,)
+    elif hint is None:
+        return (type(None),)
+
+    return (hint,)
+
+
+@functools.lru_cache(maxsize=None)
+def _field_checks(model: type) -> typing.List[typing.Tuple[str, typing.Tuple[type, ...]]]:
+    hints = typing.get_type_hints(model)
+    return [(field.name, _allowed_types(hints[field.name])) for field in dataclasses.fields(model)]
+
+
+def validate_types(instance: typing.Any) -> None:
+    """
+    Raises TypeError if a field of a `checked_types` model doesn't match its annotation. Generic arguments
+    (e.g. the `str` in `Tuple[str, ...]`) aren't checked.
+    """
+    model = type(instance)
+    if model not in _CHECKED_MODELS:
+        return
+
+    for field_name, allowed_types in _field_checks(model):
+        value = getattr(instance, field_name)
+        if not isinstance(value, allowed_types):
+            raise TypeError(
+                f"{model.__name__}.{field_name} should be "
+                f"{' or '.join(allowed_type.__name__ for allowed_type in allowed_types)}, got {value!r}"
+            )
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import time
+import typing
+
+import aiohttp
+
+from sean_learns_german.errors import NotionQueryFailed
+from sean_learns_german.load_report import LoadReport
+from sean_learns_german.models.german_models import BankWord, Phrase
+from sean_learns_german.my_notion_client import (
+    NOTION_API_URL,
+    NOTION_GERMAN_BANK_DATABASE_ID,
+    NOTION_REQUESTS_PER_SECOND,
+    NOTION_VERSION,
+    GermanBankResultParser,
+    backoff_delay,
+    parse_retry_after,
+    source_tag,
+)
+from sean_learns_german.rate_limit import TokenBucket
+
+
+class AsyncGermanBankNotionClient(GermanBankResultParser):
+    """
+    asyncio counterpart of `GermanBankNotionClient`, for use inside an event loop:
+
+        async with AsyncGermanBankNotionClient(token) as client:
+            async for item in client.iter_bank_items():
+                ...
+
+    Several databases can be queried concurrently; they share one connection pool and one rate limit, since Notion
+    limits requests per integration. Their items are then tagged with the database they came from, as with
+    `GermanBankNotionClient`.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        database_ids: typing.Sequence[str] = (NOTION_GERMAN_BANK_DATABASE_ID,),
+        source_names: typing.Optional[typing.Mapping[str, str]] = None,
+        api_url: str = NOTION_API_URL,
+        max_retries: int = 5,
+        max_backoff: float = 30.0,
+        prefetch_pages: int = 2,
+    ):
+        self._token = token
+        self._database_ids = list(dict.fromkeys(database_ids))
+        self._source_names = source_names or {}
+        self._api_url = api_url
+        self._max_retries = max_retries
+        self._max_backoff = max_backoff
+        self._prefetch_pages = prefetch_pages
+        self._rate_limiter = TokenBucket(rate=NOTION_REQUESTS_PER_SECOND, capacity=NOTION_REQUESTS_PER_SECOND)
+        self._session: typing.Optional[aiohttp.ClientSession] = None
+        # Statistics of the latest load, filled in as its items are consumed.
+        self.load_report = LoadReport()
+
+    async def __aenter__(self) -> 'AsyncGermanBankNotionClient':
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=4),
+            headers={
+                'Authorization': f"Bearer {self._token}",
+                'Notion-Version': NOTION_VERSION,
+                'Content-Type': 'application/json',
+            },
+            timeout=aiohttp.ClientTimeout(total=60),
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post_query(self, database_id: str, send_json: dict) -> dict:
+        if self._session is None:
+            raise RuntimeError("AsyncGermanBankNotionClient must be used with `async with`")
+
+        url = f"{self._api_url}/databases/{database_id}/query"
+
+        for attempt in range(self._max_retries + 1):
+            await asyncio.sleep(self._rate_limiter.reserve())
+
+            try:
+                async with self._session.post(url, json=send_json) as response:
+                    if response.status == 429:
+                        retry_after = parse_retry_after(response.headers)
+                        self._rate_limiter.slow_down(retry_after)
+                        failure = "rate limited"
+                        delay = max(retry_after or 0, backoff_delay(attempt, self._max_backoff))
+                    elif response.status >= 500:
+                        failure = f"server error {response.status}"
+                        delay = max(parse_retry_after(response.headers) or 0, backoff_delay(attempt, self._max_backoff))
+                    else:
+                        response.raise_for_status()
+                        self._rate_limiter.speed_up()
+                        return await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                failure = str(e) or e.__class__.__name__
+                delay = backoff_delay(attempt, self._max_backoff)
+
+            if attempt < self._max_retries:
+                logging.info("Notion query failed (%s), retrying in %.1fs", failure, delay)
+                await asyncio.sleep(delay)
+
+        raise NotionQueryFailed(
+            f"Notion query failed after {self._max_retries + 1} attempts ({failure})",
+            start_cursor=send_json.get('start_cursor'),
+        )
+
+    async def _query_pages(
+        self,
+        database_id: str,
+        filter_: typing.Optional[dict] = None,
+        start_cursor: typing.Optional[str] = None,
+    ) -> typing.AsyncGenerator[typing.List[dict], None]:
+        has_more = True
+
+        while has_more:
+            send_json = {'page_size': 100}
+            if start_cursor:
+                send_json['start_cursor'] = start_cursor
+            if filter_:
+                send_json['filter'] = filter_
+
+            started_at = time.perf_counter()
+            data = await self._post_query(database_id, send_json)
+            self.load_report.add_page(len(data['results']), time.perf_counter() - started_at)
+
+            yield data['results']
+
+            has_more = data['has_more']
+            start_cursor = data['next_cursor']
+
+    async def _produce_pages(self, database_id: str, pages: asyncio.Queue) -> None:
+        async for page in self._query_pages(database_id):
+            await pages.put((database_id, page))
+
+    async def iter_bank_items(
+        self,
+        database_ids: typing.Optional[typing.Sequence[str]] = None,
+    ) -> typing.AsyncGenerator[typing.Union[BankWord, Phrase], None]:
+        """
+        Yields the parsed items of every database, querying them concurrently. Pages are parsed in the order they
+        arrive, so items from different databases are interleaved.
+        """
+        database_ids = list(dict.fromkeys(database_ids or self._database_ids))
+        self.load_report = LoadReport()
+        tags = {
+            database_id: source_tag(database_id, self._source_names) if len(database_ids) > 1 else None
+            for database_id in database_ids
+        }
+
+        def parse_page(database_id: str, page: typing.List[dict]) -> typing.Iterator[typing.Union[BankWord, Phrase]]:
+            return self._parse_results(page, self.load_report, tag=tags[database_id])
+
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self._prefetch_pages * len(database_ids))
+
+        async def produce_all() -> None:
+            tasks = [asyncio.ensure_future(self._produce_pages(database_id, pages)) for database_id in database_ids]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        producer = asyncio.ensure_future(produce_all())
+
+        try:
+            while True:
+                next_page = asyncio.ensure_future(pages.get())
+                await asyncio.wait({next_page, producer}, return_when=asyncio.FIRST_COMPLETED)
+
+                if not next_page.done():
+                    next_page.cancel()
+                    # Every database has been queried (or one failed): drain what's left and surface any error.
+                    while not pages.empty():
+                        for german_bank_item in parse_page(*pages.get_nowait()):
+                            yield german_bank_item
+                    producer.result()
+                    self.load_report.log()
+                    return
+
+                for german_bank_item in parse_page(*next_page.result()):
+                    yield german_bank_item
+        finally:
+            producer.cancel()
@@ -1,150 +1,359 @@
+import concurrent.futures
+import dataclasses
+import functools
 import logging
-import requests
+import random
+import time
 import typing
 
-from sean_learns_german.constants import BankCategory, GermanCase, NounGender, PartsOfSpeech
-from sean_learns_german.errors import MissingCategory, MissingGender, MissingGerman, MissingPartOfSpeech
-from sean_learns_german.models.german_models import BankWord, BankNoun, BankVocabulary, Phrase, Verb
+import requests
+import requests.adapters
+
+from sean_learns_german.bank import GermanBank
+from sean_learns_german.errors import MissingCategory, MissingGender, MissingGerman, MissingPartOfSpeech, NotionQueryFailed
+from sean_learns_german.load_report import LoadReport
+from sean_learns_german.models.german_models import BankWord, BankNoun, Phrase, Verb
+from sean_learns_german.notion_cache import NotionQueryCache
+from sean_learns_german.notion_schema import extract_bank_item, parse_property
+from sean_learns_german.pipeline import prefetch
+from sean_learns_german.rate_limit import TokenBucket
 
 
 NOTION_GERMAN_BANK_DATABASE_ID = "0bf4b6fd23af40dba8d4c23206b2f1e3"
+# Prefix of the tag that says which database an item came from, when several are merged into one bank.
+SOURCE_TAG_PREFIX = "source::"
 
+NOTION_API_URL = "https://api.notion.com/v1"
+# Timestamp filters (used for incremental syncs) need at least this version of the API.
+NOTION_VERSION = "2022-06-28"
+# Notion allows an average of three requests per second per integration.
+NOTION_REQUESTS_PER_SECOND = 3.0
+# Query parameters that leave every property but the title out of the results, for listing page ids.
+PAGE_IDS_ONLY_PARAMS = {'filter_properties': 'title'}
+
+
+def parse_retry_after(headers: typing.Mapping[str, str]) -> typing.Optional[float]:
+    try:
+        return float(headers['Retry-After'])
+    except (KeyError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, max_backoff: float) -> float:
+    return min(max_backoff, 2 ** attempt) * random.uniform(0.5, 1.0)
 
-class GermanBankNotionClient:
-    def __init__(self, token: str):
-        self._token = token
+
+def source_tag(database_id: str, source_names: typing.Mapping[str, str]) -> str:
+    return f"{SOURCE_TAG_PREFIX}{source_names.get(database_id, database_id)}"
+
+
+def _then_raise(
+    results: typing.Iterable[dict],
+    error: typing.Optional[Exception],
+) -> typing.Generator[dict, None, None]:
+    """
+    Yields the results, then raises `error` (if any): a failed query replayed, for the cache to keep what it got.
+    """
+    yield from results
+    if error is not None:
+        raise error
+
+
+class GermanBankResultParser:
+    """
+    Maps Notion database query results onto the bank models. Shared by the sync and async clients.
+    """
 
     def _parse_property(self, property_dict: dict) -> typing.Optional[str]:
-        if property_dict['type'] == 'title':
+        return parse_property(property_dict)
+
+    def _parse_result(self, result: dict) -> typing.Union[BankWord, Phrase]:
+        return extract_bank_item(result)
+
+    def _parse_results(
+        self,
+        results: typing.Iterable[dict],
+        report: typing.Optional[LoadReport] = None,
+        tag: typing.Optional[str] = None,
+    ) -> typing.Generator[typing.Union[BankWord, Phrase], None, None]:
+        """
+        Parses the results, skipping the rows that can't be parsed. Skipped rows are counted in `report` by error, and
+        only logged one by one at debug level. Each item is given `tag`, if any, on top of its own tags.
+        """
+        if report is None:
+            report = LoadReport()
+
+        for result in results:
+            report.rows += 1
+            started_at = time.perf_counter()
             try:
-                return self._parse_property(property_dict['title'][0])
-            except IndexError:
-                raise MissingGerman()
-        elif property_dict['type'] == 'rich_text':
-            if property_dict['rich_text']:
-                return self._parse_property(property_dict['rich_text'][0])
-            else:
-                return None
-        elif property_dict['type'] == 'text':
-            return property_dict['plain_text']
-        elif property_dict['type'] == 'select':
-            if property_dict['select']:
-                return property_dict['select']['name']
+                german_bank_item = self._parse_result(result)
+            except (TypeError, MissingGerman, MissingPartOfSpeech, MissingGender, MissingCategory) as e:
+                report.parse_seconds += time.perf_counter() - started_at
+                report.add_skipped(e)
+                # Logs the raw German property: parsing it again would raise again for rows missing their German.
+                logging.debug(
+                    "Skipping %s (%s): %s",
+                    result.get('id'),
+                    result['properties'].get('German'),
+                    str(e) or type(e).__name__,
+                )
+                continue
+            report.parse_seconds += time.perf_counter() - started_at
+
+            if 'anki ignore' in german_bank_item.tags:
+                report.ignored += 1
+                continue
+
+            if isinstance(german_bank_item, Verb) and not german_bank_item.fully_conjugated:
+                report.incomplete_verbs += 1
+
+            if tag is not None:
+                german_bank_item = dataclasses.replace(german_bank_item, tags=(*german_bank_item.tags, tag))
+
+            report.items += 1
+            yield german_bank_item
+
+
+class GermanBankNotionClient(GermanBankResultParser):
+    """
+    Loads the bank from one or more Notion databases. Several databases are queried concurrently, at most
+    `max_parallel_databases` at a time (they share one rate limit, since Notion limits requests per integration), and
+    merged into one bank in the order given. Their items are tagged with `source::` and the database's name in
+    `source_names` (or its id), so the notes built from them say where they came from.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        database_ids: typing.Sequence[str] = (NOTION_GERMAN_BANK_DATABASE_ID,),
+        source_names: typing.Optional[typing.Mapping[str, str]] = None,
+        max_parallel_databases: int = 2,
+        cache: typing.Optional[NotionQueryCache] = None,
+        full_refresh: bool = False,
+        prune_deleted: bool = False,
+        api_url: str = NOTION_API_URL,
+        max_retries: int = 5,
+        max_backoff: float = 30.0,
+        prefetch_pages: int = 2,
+    ):
+        self._token = token
+        self._database_ids = list(dict.fromkeys(database_ids))
+        self._source_names = source_names or {}
+        self._max_parallel_databases = max_parallel_databases
+        self._cache = cache
+        self._full_refresh = full_refresh
+        # Whether incremental cache syncs list every page id to drop the rows deleted in Notion. Full refreshes always
+        # do; this costs a request per hundred rows on every other sync.
+        self._prune_deleted = prune_deleted
+        self._api_url = api_url
+        self._max_retries = max_retries
+        self._max_backoff = max_backoff
+        self._prefetch_pages = prefetch_pages
+        self._bank: typing.Optional[GermanBank] = None
+        # Statistics of the latest load, filled in as its items are consumed.
+        self.load_report = LoadReport()
+        self._rate_limiter = TokenBucket(rate=NOTION_REQUESTS_PER_SECOND, capacity=NOTION_REQUESTS_PER_SECOND)
+
+        self._session = requests.Session()
+        self._session.mount(api_url, requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self._session.headers.update({
+            'Authorization': f"Bearer {token}",
+            'Notion-Version': NOTION_VERSION,
+            'Content-Type': 'application/json',
+        })
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> 'GermanBankNotionClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _post_query(self, database_id: str, send_json: dict, params: typing.Optional[dict] = None) -> dict:
+        """
+        Posts one database query, pacing requests to the rate limit and retrying rate limited (429), server error (5xx)
+        and connection failures with bounded exponential backoff.
+        """
+        url = f"{self._api_url}/databases/{database_id}/query"
+
+        for attempt in range(self._max_retries + 1):
+            self._rate_limiter.acquire()
+
+            try:
+                response = self._session.post(url, params=params, json=send_json, timeout=60)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                failure = str(e)
+                delay = backoff_delay(attempt, self._max_backoff)
             else:
-                return None
-        else:
-            raise Exception(f"Unknown property type '{property_dict['type']}'")
+                if response.status_code == 429:
+                    retry_after = parse_retry_after(response.headers)
+                    self._rate_limiter.slow_down(retry_after)
+                    failure = "rate limited"
+                    delay = max(retry_after or 0, backoff_delay(attempt, self._max_backoff))
+                elif response.status_code >= 500:
+                    failure = f"server error {response.status_code}"
+                    delay = max(parse_retry_after(response.headers) or 0, backoff_delay(attempt, self._max_backoff))
+                else:
+                    response.raise_for_status()
+                    self._rate_limiter.speed_up()
+                    return response.json()
 
-    def _parse_result(self, result: dict) -> typing.Union[BankWord, Phrase]:
-        if result['properties']['Category'] is None:
-            raise MissingCategory()
-
-        category = self._parse_property(result['properties']['Category'])
-        part_of_speech = self._parse_property(result['properties']['Part of speech'])
-
-        if category == BankCategory.PHRASE:
-            return Phrase(
-                german=self._parse_property(result['properties']['German']),
-                english=self._parse_property(result['properties']['English']),
-                # tags=row.tags,
-                tags=[],
-            )
-        elif part_of_speech == PartsOfSpeech.NOUN:
-            return BankNoun(
-                german_word_singular=self._parse_property(result['properties']['German']),
-                german_word_plural=self._parse_property(result['properties']['German plural']),
-                english_word=self._parse_property(result['properties']['English']),
-                english_synonyms=self._parse_property(result['properties']['English synonyms']) or "",
-                gender=NounGender.from_string(self._parse_property(result['properties']['Gender'])),
-                # tags=row.tags,
-                tags=[],
-            )
-        elif part_of_speech == PartsOfSpeech.VERB:
-            return Verb(
-                german_word=self._parse_property(result['properties']['German']),
-                english_word=self._parse_property(result['properties']['English']),
-                english_synonyms=self._parse_property(result['properties']['English synonyms']) or "",
-                conj_ich_1ps=self._parse_property(result['properties']['Conj (ich/1PS)']),
-                conj_du_2ps=self._parse_property(result['properties']['Conj (du/2PS)']),
-                conj_er_3ps=self._parse_property(result['properties']['Conj (er/3PS)']),
-                conj_wir_1pp=self._parse_property(result['properties']['Conj (wir/1PP)']),
-                conj_ihr_2pp=self._parse_property(result['properties']['Conj (ihr/2PP)']),
-                conj_sie_3pp=self._parse_property(result['properties']['Conj (Sie/3PP)']),
-                requires_case=GermanCase.from_string(self._parse_property(result['properties']['Requires case'])),
-                # tags=row.tags,
-                tags=[],
-            )
-        else:
-            return BankVocabulary(
-                german=self._parse_property(result['properties']['German']),
-                english_word=self._parse_property(result['properties']['English']),
-                english_synonyms=self._parse_property(result['properties']['English synonyms']) or "",
-                part_of_speech=self._parse_property(result['properties']['Part of speech']),
-                # tags=row.tags,
-                tags=[],
-            )
+            if attempt < self._max_retries:
+                logging.info("Notion query failed (%s), retrying in %.1fs", failure, delay)
+                time.sleep(delay)
 
-    def load_bank_items(self) -> typing.Generator[typing.Union[BankWord, Phrase], None, None]:
-        start_cursor: typing.Optional[str] = None
+        raise NotionQueryFailed(
+            f"Notion query failed after {self._max_retries + 1} attempts ({failure})",
+            start_cursor=send_json.get('start_cursor'),
+        )
+
+    def _query_pages(
+        self,
+        database_id: str,
+        filter_: typing.Optional[dict] = None,
+        start_cursor: typing.Optional[str] = None,
+    ) -> typing.Generator[typing.List[dict], None, None]:
         has_more = True
 
         while has_more:
             send_json = {'page_size': 100}
             if start_cursor:
                 send_json['start_cursor'] = start_cursor
+            if filter_:
+                send_json['filter'] = filter_
 
-            response = requests.post(
-                url=f"https://api.notion.com/v1/databases/{NOTION_GERMAN_BANK_DATABASE_ID}/query",
-                headers={
-                    'Authorization': f"Bearer {self._token}",
-                    'Notion-Version': '2021-08-16',
-                    'Content-Type': 'application/json',
-                },
-                json=send_json,
-            )
+            started_at = time.perf_counter()
+            data = self._post_query(database_id, send_json)
+            self.load_report.add_page(len(data['results']), time.perf_counter() - started_at)
 
-            response.raise_for_status()
-            data = response.json()
+            yield data['results']
 
+            has_more = data['has_more']
+            start_cursor = data['next_cursor']
+
+    def _query_database(
+        self,
+        database_id: str,
+        filter_: typing.Optional[dict] = None,
+        start_cursor: typing.Optional[str] = None,
+    ) -> typing.Generator[dict, None, None]:
+        """
+        Yields every result of the database query. The following pages are fetched in the background while the
+        current one is consumed. If the query fails part way through, the raised `NotionQueryFailed` holds the cursor
+        to pass back in as `start_cursor` to carry on from there.
+        """
+        for page in prefetch(self._query_pages(database_id, filter_, start_cursor), depth=self._prefetch_pages):
+            yield from page
+
+    def _query_page_ids(self, database_id: str) -> typing.Generator[str, None, None]:
+        """
+        Yields the id of every page of the database. Only the title property comes back, so the pages are small; this
+        is how incremental cache syncs find the rows deleted since the last sync.
+        """
+        send_json = {'page_size': 100}
+
+        while True:
+            data = self._post_query(database_id, send_json, params=PAGE_IDS_ONLY_PARAMS)
             for result in data['results']:
-                try:
-                    german_bank_item = self._parse_result(result)
-                except TypeError as e:
-                    # import pdb; pdb.set_trace()
-                    logging.warning("Skipping %s: %s", self._parse_property(result['properties']['German']), str(e))
-                    continue
-                except MissingGerman:
-                    logging.warning("%s is missing german, skipping...", result['properties']['German'])
-                    continue
-                except MissingPartOfSpeech:
-                    logging.warning("%s is missing part of speech, skipping...", result['properties']['German'])
-                    continue
-                except MissingGender:
-                    logging.warning("%s is missing gender, skipping...", result['properties']['German'])
-                    continue
-                except MissingCategory:
-                    logging.warning("%s is missing category, skipping...", result['properties']['German'])
-                    continue
-
-                if 'anki ignore' in german_bank_item.tags:
-                    continue
-
-                yield german_bank_item
-
-                has_more = data['has_more']
-                # has_more = False
-                start_cursor = data['next_cursor']
+                yield result['id']
 
-    def get_bank_verbs(self) -> typing.List[Verb]:
-        return [
-            german_bank_item
-            for german_bank_item in self.load_bank_items()
-            if isinstance(german_bank_item, Verb)
+            if not data['has_more']:
+                return
+            send_json = {'page_size': 100, 'start_cursor': data['next_cursor']}
+
+    def _load_results(self, database_id: str) -> typing.Iterable[dict]:
+        """
+        The database's results, streamed so they can be parsed while the next pages are fetched: straight from Notion,
+        or as they're stored in the cache on a full sync. An incremental sync merges the (few) edited pages in first,
+        then reads the cache.
+        """
+        if self._cache is None:
+            return self._query_database(database_id)
+
+        return self._cache.sync_results(
+            database_id,
+            functools.partial(self._query_database, database_id),
+            full_refresh=self._full_refresh,
+            page_ids=functools.partial(self._query_page_ids, database_id) if self._prune_deleted else None,
+        )
+
+    def _load_results_in_parallel(self) -> typing.Generator[typing.Tuple[str, typing.Iterable[dict]], None, None]:
+        """
+        Yields each database's results, in order, fetching up to `max_parallel_databases` of them at once. Each
+        database's results are held in memory until its turn; the cache is only touched on this thread. If a query
+        fails, the results fetched before the failure still go to the cache, so its next sync carries on from there.
+        """
+        pending_syncs = {}
+        if self._cache is not None:
+            for database_id in self._database_ids:
+                pending_syncs[database_id] = self._cache.start_sync(database_id, self._full_refresh)
+
+        FetchedDatabase = typing.Tuple[
+            typing.List[dict],
+            typing.Optional[typing.List[str]],
+            typing.Optional[NotionQueryFailed],
         ]
 
+        def fetch(database_id: str) -> FetchedDatabase:
+            pending_sync = pending_syncs.get(database_id)
+            filter_ = pending_sync.filter_ if pending_sync is not None else None
+            start_cursor = pending_sync.start_cursor if pending_sync is not None else None
+
+            results: typing.List[dict] = []
+            try:
+                results.extend(self._query_database(database_id, filter_, start_cursor))
+            except NotionQueryFailed as e:
+                return results, None, e
+
+            if filter_ is None or not self._prune_deleted:
+                return results, None, None
+            return results, list(self._query_page_ids(database_id)), None
+
+        executor = concurrent.futures.ThreadPoolExecutor(self._max_parallel_databases, thread_name_prefix="notion")
+        with executor:
+            fetched = zip(self._database_ids, executor.map(fetch, self._database_ids))
+            for database_id, (results, page_ids, error) in fetched:
+                if self._cache is None:
+                    if error is not None:
+                        raise error
+                    yield database_id, results
+                else:
+                    self._cache.finish_sync(pending_syncs[database_id], _then_raise(results, error), page_ids)
+                    yield database_id, self._cache.results(database_id)
+
+    def load_bank_items(self) -> typing.Generator[typing.Union[BankWord, Phrase], None, None]:
+        """
+        Yields the parsed bank items. Their `load_report` is complete, and its summary logged, once they're all consumed.
+        """
+        self.load_report = LoadReport()
+
+        if len(self._database_ids) == 1:
+            # A single database is streamed, parsing each page while the next ones are fetched.
+            yield from self._parse_results(self._load_results(self._database_ids[0]), self.load_report)
+        else:
+            for database_id, results in self._load_results_in_parallel():
+                yield from self._parse_results(
+                    results,
+                    self.load_report,
+                    tag=source_tag(database_id, self._source_names),
+                )
+
+        self.load_report.log()
+
+    def load_bank(self) -> GermanBank:
+        """
+        Loads the whole bank in a single pass over the Notion database. The result is kept on the client, so
+        later calls (and `get_bank_nouns` / `get_bank_verbs`) don't query Notion again.
+        """
+        if self._bank is None:
+            self._bank = GermanBank(self.load_bank_items())
+        return self._bank
+
+    def get_bank_verbs(self) -> typing.List[Verb]:
+        return self.load_bank().verbs
+
     def get_bank_nouns(self) -> typing.List[BankNoun]:
-        return [
-            german_bank_item
-            for german_bank_item in self.load_bank_items()
-            if isinstance(german_bank_item, BankNoun)
-        ]
+        return self.load_bank().nouns
@@ -0,0 +1,347 @@
+import contextlib
+import dataclasses
+import datetime
+import json
+import logging
+import sqlite3
+import typing
+
+from sean_learns_german.errors import NotionQueryFailed
+
+
+# Called with an optional Notion filter and the cursor to start from.
+QueryFunction = typing.Callable[[typing.Optional[dict], typing.Optional[str]], typing.Iterable[dict]]
+PageIdsFunction = typing.Callable[[], typing.Iterable[str]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    database_id TEXT NOT NULL,
+    page_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    -- When the full sync that last returned the page started.
+    full_sync TEXT NOT NULL,
+    created_time TEXT NOT NULL,
+    last_edited_time TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (database_id, page_id)
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    database_id TEXT PRIMARY KEY,
+    last_synced_at TEXT NOT NULL,
+    last_full_sync_at TEXT NOT NULL
+);
+
+-- Full syncs that failed part way through, and where to carry on from.
+CREATE TABLE IF NOT EXISTS interrupted_syncs (
+    database_id TEXT PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    start_cursor TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+"""
+
+# Notion rounds last_edited_time down to the minute, so incremental syncs look back a little further than the last
+# sync to avoid missing rows edited while it was running.
+_SYNC_OVERLAP = datetime.timedelta(minutes=2)
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+@dataclasses.dataclass(frozen=True)
+class PendingSync:
+    """
+    A sync started by `NotionQueryCache.start_sync`, waiting for the results of querying Notion with `filter_` (None
+    for a full sync, which queries every page) from `start_cursor`. A full sync carrying on from an interrupted one
+    starts from its cursor, and stores its pages from `position` on.
+    """
+    database_id: str
+    filter_: typing.Optional[dict]
+    started_at: datetime.datetime
+    last_full_sync_at: datetime.datetime
+    start_cursor: typing.Optional[str] = None
+    position: int = 0
+
+
+class NotionQueryCache:
+    """
+    On-disk cache of the raw results of a Notion database query, keyed by page id and `last_edited_time`.
+
+    The first sync (and every `full_refresh_interval` afterwards) pages through the whole database and drops any
+    cached page that Notion no longer returns. If it fails part way through (`NotionQueryFailed`), the pages fetched so
+    far are kept, and the next sync carries on from the failed page's cursor. Pages are kept in the order Notion
+    returned them, with the pages created since the last full sync after them, so the cache gives the same order a full
+    query does.
+
+    In between, only pages edited since the previous sync are requested and merged in. Query results leave out deleted
+    (archived) pages, so deleted rows stay cached until the next full refresh, unless an incremental sync is also given
+    the ids of every page still in the database (which takes a request per hundred pages) to drop the cached pages that
+    aren't among them.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        full_refresh_interval: datetime.timedelta = datetime.timedelta(days=7),
+    ):
+        self._filename = filename
+        self._full_refresh_interval = full_refresh_interval
+        self._connection = sqlite3.connect(filename)
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def _get_sync_state(self, database_id: str) -> typing.Optional[typing.Tuple[datetime.datetime, datetime.datetime]]:
+        row = self._connection.execute(
+            "SELECT last_synced_at, last_full_sync_at FROM sync_state WHERE database_id = ?",
+            (database_id,),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return datetime.datetime.fromisoformat(row[0]), datetime.datetime.fromisoformat(row[1])
+
+    def sync(
+        self,
+        database_id: str,
+        query: QueryFunction,
+        full_refresh: bool = False,
+        page_ids: typing.Optional[PageIdsFunction] = None,
+    ) -> None:
+        """
+        Brings the cached copy of `database_id` up to date. `query` is called with an optional Notion filter and start
+        cursor, and must return every matching result from there. `page_ids`, if given, must return the id of every
+        page in the database; incremental syncs call it to find the pages that were deleted.
+        """
+        pending_sync = self.start_sync(database_id, full_refresh)
+        self.finish_sync(
+            pending_sync,
+            query(pending_sync.filter_, pending_sync.start_cursor),
+            page_ids() if page_ids is not None and pending_sync.filter_ is not None else None,
+        )
+
+    def sync_results(
+        self,
+        database_id: str,
+        query: QueryFunction,
+        full_refresh: bool = False,
+        page_ids: typing.Optional[PageIdsFunction] = None,
+    ) -> typing.Generator[dict, None, None]:
+        """
+        `sync`, then `results`, as one stream: a full sync yields each page as soon as it's stored, so the caller can
+        parse it while the next pages are fetched, instead of waiting for the whole database. The sync is only
+        committed once every result has been consumed.
+        """
+        pending_sync = self.start_sync(database_id, full_refresh)
+
+        if pending_sync.filter_ is None:
+            # Carrying on from an interrupted sync: its pages come first.
+            yield from self._query_results(
+                "SELECT result FROM pages WHERE database_id = ? AND full_sync = ? AND position < ? ORDER BY position",
+                (database_id, pending_sync.started_at.isoformat(), pending_sync.position),
+            )
+            yield from self._full_sync(pending_sync, query(None, pending_sync.start_cursor))
+        else:
+            self._incremental_sync(
+                pending_sync,
+                query(pending_sync.filter_, None),
+                page_ids() if page_ids is not None else None,
+            )
+            yield from self.results(database_id)
+
+    def start_sync(self, database_id: str, full_refresh: bool = False) -> 'PendingSync':
+        """
+        The first half of `sync`: decides between a full and an incremental sync (or carrying on with an interrupted
+        full sync, unless `full_refresh`), and returns the Notion filter and cursor to query with. Querying is left to
+        the caller (e.g. on another thread, as the cache's connection can only be used on the thread that opened it),
+        and the results are passed to `finish_sync`, along with the id of every page in the database for an
+        incremental sync (one with a filter).
+        """
+        sync_started_at = _now()
+        sync_state = self._get_sync_state(database_id)
+
+        interrupted_sync = self._connection.execute(
+            "SELECT started_at, start_cursor, position FROM interrupted_syncs WHERE database_id = ?",
+            (database_id,),
+        ).fetchone()
+        if interrupted_sync is not None and not full_refresh:
+            started_at, start_cursor, position = interrupted_sync
+            logging.info("Carrying on with the interrupted refresh of the Notion cache for database %s", database_id)
+            started_at = datetime.datetime.fromisoformat(started_at)
+            return PendingSync(database_id, None, started_at, started_at, start_cursor, position)
+
+        if sync_state is None or full_refresh or sync_started_at - sync_state[1] > self._full_refresh_interval:
+            logging.info("Fully refreshing the Notion cache for database %s", database_id)
+            return PendingSync(database_id, None, sync_started_at, sync_started_at)
+
+        since, last_full_sync_at = sync_state
+        logging.info("Fetching Notion pages of database %s edited since %s", database_id, since.isoformat())
+        filter_ = {
+            'timestamp': 'last_edited_time',
+            'last_edited_time': {'on_or_after': (since - _SYNC_OVERLAP).isoformat()},
+        }
+        return PendingSync(database_id, filter_, sync_started_at, last_full_sync_at)
+
+    def finish_sync(
+        self,
+        pending_sync: 'PendingSync',
+        results: typing.Iterable[dict],
+        page_ids: typing.Optional[typing.Iterable[str]] = None,
+    ) -> None:
+        if pending_sync.filter_ is None:
+            for _ in self._full_sync(pending_sync, results):
+                pass
+        else:
+            self._incremental_sync(pending_sync, results, page_ids)
+
+    def _full_sync(
+        self,
+        pending_sync: 'PendingSync',
+        results: typing.Iterable[dict],
+    ) -> typing.Generator[dict, None, None]:
+        """
+        Stores the results, yielding each one that's kept as it is stored. If the query fails, the pages stored so far
+        are committed along with the cursor to carry on from.
+        """
+        database_id = pending_sync.database_id
+        full_sync = pending_sync.started_at.isoformat()
+        position = pending_sync.position
+
+        try:
+            for result in results:
+                if self._store_result(database_id, result, full_sync, position):
+                    position += 1
+                    yield result
+        except NotionQueryFailed as e:
+            if e.start_cursor is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO interrupted_syncs VALUES (?, ?, ?, ?)",
+                    (database_id, full_sync, e.start_cursor, position),
+                )
+                self._connection.commit()
+                logging.warning(
+                    "Kept the %d Notion pages fetched so far; the next sync of database %s carries on from there",
+                    position,
+                    database_id,
+                )
+            else:
+                self._connection.rollback()
+            raise
+        except BaseException:
+            self._connection.rollback()
+            raise
+
+        with self._connection:
+            deleted = self._connection.execute(
+                "DELETE FROM pages WHERE database_id = ? AND full_sync != ?",
+                (database_id, full_sync),
+            ).rowcount
+            self._connection.execute("DELETE FROM interrupted_syncs WHERE database_id = ?", (database_id,))
+            self._set_sync_state(database_id, pending_sync.started_at, pending_sync.started_at)
+
+        logging.info("Dropped %d deleted pages from the Notion cache", deleted)
+
+    def _incremental_sync(
+        self,
+        pending_sync: 'PendingSync',
+        results: typing.Iterable[dict],
+        page_ids: typing.Optional[typing.Iterable[str]],
+    ) -> None:
+        database_id = pending_sync.database_id
+
+        with self._connection:
+            updated = sum(
+                1
+                for result in results
+                if self._store_result(database_id, result, pending_sync.last_full_sync_at.isoformat())
+            )
+
+            if page_ids is not None:
+                self._connection.execute("CREATE TEMPORARY TABLE IF NOT EXISTS live_pages (page_id TEXT PRIMARY KEY)")
+                self._connection.execute("DELETE FROM live_pages")
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO live_pages VALUES (?)",
+                    ((page_id,) for page_id in page_ids),
+                )
+                deleted = self._connection.execute(
+                    "DELETE FROM pages WHERE database_id = ? AND page_id NOT IN (SELECT page_id FROM live_pages)",
+                    (database_id,),
+                ).rowcount
+
+            self._set_sync_state(database_id, pending_sync.started_at, pending_sync.last_full_sync_at)
+
+        logging.info("Merged %d edited pages into the Notion cache", updated)
+        if page_ids is None:
+            logging.info(
+                "Rows deleted from Notion database %s stay in the cache until its next full refresh",
+                database_id,
+            )
+        else:
+            logging.info("Dropped %d deleted pages from the Notion cache", deleted)
+
+    def _store_result(
+        self,
+        database_id: str,
+        result: dict,
+        full_sync: str,
+        position: typing.Optional[int] = None,
+    ) -> bool:
+        """
+        Stores a result at `position`, as returned by the `full_sync` started then. Without a position (in an
+        incremental sync), the result stays where it was, or goes after every page if it's new, and `full_sync` is only
+        used for new pages. Archived results are dropped instead.
+        """
+        if result.get('archived') or result.get('in_trash'):
+            self._connection.execute(
+                "DELETE FROM pages WHERE database_id = ? AND page_id = ?",
+                (database_id, result['id']),
+            )
+            return False
+
+        self._connection.execute(
+            """
+            INSERT INTO pages VALUES (
+                :database_id,
+                :page_id,
+                COALESCE(:position, (SELECT MAX(position) + 1 FROM pages WHERE database_id = :database_id), 0),
+                :full_sync,
+                :created_time,
+                :last_edited_time,
+                :result
+            )
+            ON CONFLICT (database_id, page_id) DO UPDATE SET
+                position = COALESCE(:position, position),
+                full_sync = CASE WHEN :position IS NULL THEN full_sync ELSE excluded.full_sync END,
+                created_time = excluded.created_time,
+                last_edited_time = excluded.last_edited_time,
+                result = excluded.result
+            """,
+            {
+                'database_id': database_id,
+                'page_id': result['id'],
+                'position': position,
+                'full_sync': full_sync,
+                'created_time': result['created_time'],
+                'last_edited_time': result['last_edited_time'],
+                'result': json.dumps(result),
+            },
+        )
+        return True
+
+    def _set_sync_state(self, database_id: str, synced_at: datetime.datetime, full_sync_at: datetime.datetime) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?)",
+            (database_id, synced_at.isoformat(), full_sync_at.isoformat()),
+        )
+
+    def results(self, database_id: str) -> typing.Generator[dict, None, None]:
+        return self._query_results("SELECT result FROM pages WHERE database_id = ? ORDER BY position", (database_id,))
+
+    def _query_results(self, sql: str, parameters: tuple) -> typing.Generator[dict, None, None]:
+        with contextlib.closing(self._connection.execute(sql, parameters)) as cursor:
+            for (result,) in cursor:
+                yield json.loads(result)
@@ -0,0 +1,203 @@
+import typing
+
+from sean_learns_german.constants import BankCategory, GermanCase, NounGender, PartsOfSpeech
+from sean_learns_german.errors import MissingCategory, MissingGerman
+from sean_learns_german.models.german_models import BankNoun, BankVocabulary, BankWord, Phrase, Verb
+from sean_learns_german.models.validation import validate_types
+
+
+def _parse_text(item: dict) -> str:
+    if item['type'] != 'text':
+        raise Exception(f"Unknown property type '{item['type']}'")
+    return item['plain_text']
+
+
+def _parse_title(property_dict: dict) -> str:
+    title = property_dict['title']
+    if not title:
+        raise MissingGerman()
+    return _parse_text(title[0])
+
+
+def _parse_rich_text(property_dict: dict) -> typing.Optional[str]:
+    rich_text = property_dict['rich_text']
+    if not rich_text:
+        return None
+    item = rich_text[0]
+    if item['type'] != 'text':
+        raise Exception(f"Unknown property type '{item['type']}'")
+    return item['plain_text']
+
+
+def _parse_select(property_dict: dict) -> typing.Optional[str]:
+    select = property_dict['select']
+    return select['name'] if select else None
+
+
+PROPERTY_PARSERS: typing.Dict[str, typing.Callable[[dict], typing.Optional[str]]] = {
+    'title': _parse_title,
+    'rich_text': _parse_rich_text,
+    'text': _parse_text,
+    'select': _parse_select,
+}
+
+
+def _check_property_types(properties: typing.Iterable[dict]) -> None:
+    for property_dict in properties:
+        if property_dict['type'] not in PROPERTY_PARSERS:
+            raise Exception(f"Unknown property type '{property_dict['type']}'")
+
+
+def parse_property(property_dict: dict) -> typing.Optional[str]:
+    try:
+        parser = PROPERTY_PARSERS[property_dict['type']]
+    except KeyError:
+        _check_property_types([property_dict])
+        raise
+    return parser(property_dict)
+
+
+def _empty_if_none(value: typing.Optional[str]) -> str:
+    return value or ""
+
+
+class ModelSchema:
+    """
+    Declares how a bank model is built from a Notion row: each model field maps to a Notion property name and an
+    optional converter applied to the parsed value. `row_fields` are passed in as they are, after the properties, for
+    values that come from the row itself rather than its properties (e.g. the page id). `compile` turns it into a
+    single function over a row's properties.
+    """
+
+    def __init__(
+        self,
+        model: type,
+        fields: typing.Dict[str, typing.Union[str, typing.Tuple[str, typing.Callable]]],
+        constants: typing.Optional[typing.Dict[str, typing.Callable[[], typing.Any]]] = None,
+        row_fields: typing.Sequence[str] = (),
+    ):
+        self.model = model
+        self.fields = fields
+        self.constants = constants or {}
+        self.row_fields = row_fields
+
+    def _field_specs(self) -> typing.List[typing.Tuple[str, str, typing.Optional[typing.Callable]]]:
+        return [
+            (field_name, *((spec, None) if isinstance(spec, str) else spec))
+            for field_name, spec in self.fields.items()
+        ]
+
+    def compile(self) -> typing.Callable[..., typing.Any]:
+        """
+        Turns the schema into a function from a row's properties (and `row_fields` values) to a model instance. The
+        specs are resolved once, into (field, property name, converter) tuples, so extracting a row is a single loop
+        of dict lookups and parser calls.
+        """
+        model = self.model
+        row_fields = self.row_fields
+        constants = list(self.constants.items())
+        field_specs = self._field_specs()
+
+        def extract(properties: dict, *row_values: typing.Any) -> typing.Any:
+            arguments = dict(zip(row_fields, row_values))
+            for field_name, factory in constants:
+                arguments[field_name] = factory()
+
+            try:
+                for field_name, property_name, converter in field_specs:
+                    property_dict = properties[property_name]
+                    value = PROPERTY_PARSERS[property_dict['type']](property_dict)
+                    arguments[field_name] = converter(value) if converter else value
+            except KeyError:
+                _check_property_types(properties.values())
+                raise
+
+            return model(**arguments)
+
+        return extract
+
+
+_TAGS = {'tags': tuple}
+_ROW_FIELDS = ('notion_id',)
+
+PHRASE_SCHEMA = ModelSchema(
+    Phrase,
+    fields={
+        'german': 'German',
+        'english': 'English',
+    },
+    constants=_TAGS,
+    row_fields=_ROW_FIELDS,
+)
+
+NOUN_SCHEMA = ModelSchema(
+    BankNoun,
+    fields={
+        'german_word_singular': 'German',
+        'german_word_plural': 'German plural',
+        'english_word': 'English',
+        'english_synonyms': ('English synonyms', _empty_if_none),
+        'gender': ('Gender', NounGender.from_string),
+    },
+    constants=_TAGS,
+    row_fields=_ROW_FIELDS,
+)
+
+VERB_SCHEMA = ModelSchema(
+    Verb,
+    fields={
+        'german_word': 'German',
+        'english_word': 'English',
+        'english_synonyms': ('English synonyms', _empty_if_none),
+        'conj_ich_1ps': 'Conj (ich/1PS)',
+        'conj_du_2ps': 'Conj (du/2PS)',
+        'conj_er_3ps': 'Conj (er/3PS)',
+        'conj_wir_1pp': 'Conj (wir/1PP)',
+        'conj_ihr_2pp': 'Conj (ihr/2PP)',
+        'conj_sie_3pp': 'Conj (Sie/3PP)',
+        'requires_case': ('Requires case', GermanCase.from_string),
+    },
+    constants=_TAGS,
+    row_fields=_ROW_FIELDS,
+)
+
+VOCABULARY_SCHEMA = ModelSchema(
+    BankVocabulary,
+    fields={
+        'german': 'German',
+        'english_word': 'English',
+        'english_synonyms': ('English synonyms', _empty_if_none),
+        'part_of_speech': 'Part of speech',
+    },
+    constants=_TAGS,
+    row_fields=_ROW_FIELDS,
+)
+
+
+_PHRASE = BankCategory.PHRASE.value
+_extract_phrase = PHRASE_SCHEMA.compile()
+_extract_vocabulary = VOCABULARY_SCHEMA.compile()
+_EXTRACTORS_BY_PART_OF_SPEECH = {
+    PartsOfSpeech.NOUN.value: NOUN_SCHEMA.compile(),
+    PartsOfSpeech.VERB.value: VERB_SCHEMA.compile(),
+}
+
+
+def extract_bank_item(result: dict) -> typing.Union[BankWord, Phrase]:
+    """
+    Builds the bank model for one Notion query result, picking the schema by category and part of speech.
+    """
+    properties = result['properties']
+
+    if properties['Category'] is None:
+        raise MissingCategory()
+
+    if parse_property(properties['Category']) == _PHRASE:
+        extract = _extract_phrase
+    else:
+        extract = _EXTRACTORS_BY_PART_OF_SPEECH.get(parse_property(properties['Part of speech']), _extract_vocabulary)
+
+    german_bank_item = extract(properties, result['id'])
+    # This is the only place bank models are type checked; everything derived from them is trusted.
+    validate_types(german_bank_item)
+    return german_bank_item
@@ -0,0 +1,91 @@
+import collections
+import concurrent.futures
+import itertools
+import queue
+import threading
+import typing
+
+
+T = typing.TypeVar('T')
+R = typing.TypeVar('R')
+
+_DONE = object()
+_PUT_TIMEOUT = 0.1
+
+
+def prefetch(iterable: typing.Iterable[T], depth: int = 2) -> typing.Generator[T, None, None]:
+    """
+    Iterates `iterable` on a background thread, keeping up to `depth` items ready ahead of the consumer. This lets
+    slow producers (e.g. paging through Notion) overlap with whatever the consumer does with each item.
+
+    Exceptions raised by `iterable` are re-raised to the consumer, and the background thread stops once the consumer
+    closes the generator.
+    """
+    items: queue.Queue = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+
+    def put(item, error: typing.Optional[BaseException]) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put((item, error), timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put(item, None):
+                    return
+        except BaseException as e:
+            put(_DONE, e)
+        else:
+            put(_DONE, None)
+
+    thread = threading.Thread(target=produce, name="prefetch", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def chunked(iterable: typing.Iterable[T], size: int) -> typing.Generator[typing.List[T], None, None]:
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def parallel_map(
+    function: typing.Callable[[typing.List[T]], typing.List[R]],
+    iterable: typing.Iterable[T],
+    jobs: int,
+    chunk_size: int = 1000,
+) -> typing.Generator[typing.Tuple[T, R], None, None]:
+    """
+    Runs `function` over chunks of `iterable` in a pool of `jobs` processes, and yields each item with its result in
+    the original order. `function` must be picklable (i.e. module-level), and return one result per item of a chunk.
+
+    Unlike `Executor.map`, only a few chunks per process are in flight at once, so `iterable` is consumed as the
+    results are, and can be a generator.
+    """
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        in_flight: typing.Deque[typing.Tuple[typing.List[T], concurrent.futures.Future]] = collections.deque()
+
+        for chunk in chunked(iterable, chunk_size):
+            in_flight.append((chunk, executor.submit(function, chunk)))
+            if len(in_flight) >= 2 * jobs:
+                chunk, future = in_flight.popleft()
+                yield from zip(chunk, future.result())
+
+        while in_flight:
+            chunk, future = in_flight.popleft()
+            yield from zip(chunk, future.result())
@@ -1,5 +1,11 @@
+import bisect
 import functools
+import logging
+import operator
+import os
 import random
+import threading
+import time
 import typing
 
 import click
@@ -13,9 +19,25 @@ import urwid.raw_display
 import urwid.widget
 from urwid_utils.palette import *
 
-from sean_learns_german.notion_client import GermanBankNotionClient
+from sean_learns_german.autocomplete import AutocompleteIndex, bank_word_search_texts
+from sean_learns_german.bank import GermanBank
+from sean_learns_german.cli_options import DATABASE_ID_HELP, parse_database_ids
+from sean_learns_german.load_report import LoadReport
+from sean_learns_german.my_notion_client import GermanBankNotionClient
+from sean_learns_german.notion_cache import NotionQueryCache
 from sean_learns_german.words import BANK_NOUNS, BANK_VERBS
-from sean_learns_german.models.basic_sentence import BasicSentence
+from sean_learns_german.constants import GermanCase
+from sean_learns_german.models.basic_sentence import BLANK_POSITIONS, BasicSentence, RenderedSentence
+from sean_learns_german.models.german_models import BankNoun, BankWord, Noun, Verb
+from sean_learns_german.sentence_generation import noun_variants
+
+
+# How many (subject, verb, object) selections, and blank positions of them, keep their sentence buttons.
+RENDERED_SELECTIONS_CACHE_SIZE = 256
+# How many subject words (with a verb) and object words (in a case) keep their declined and conjugated variants.
+RENDERED_WORDS_CACHE_SIZE = 256
+# How often words loading in the background are handed to the dropdowns.
+BANK_PUBLISH_INTERVAL = 1.0
 
 
 def exit_on_q(key):
@@ -54,7 +76,206 @@ panwid.keymap.KEYMAP_GLOBAL = {
 
 
 class TestDropdown(KeymapMovementMixin, Dropdown):
-    pass
+    """
+    A dropdown whose auto-complete looks matches up in an `AutocompleteIndex` over its items, rather than comparing the
+    query with every item label in turn.
+    """
+
+    def __init__(self, *args, autocomplete_index: typing.Optional[AutocompleteIndex] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.autocomplete_index = autocomplete_index
+        self.is_open = False
+        if autocomplete_index is not None:
+            # panwid builds the pop-up itself, and its completion bar calls the pop-up's `complete` on every keystroke.
+            self.pop_up.complete = self.complete_from_index
+
+    def open_pop_up(self):
+        super().open_pop_up()
+        self.is_open = True
+
+    def close_pop_up(self):
+        super().close_pop_up()
+        self.is_open = False
+
+    def complete_from_index(self, step: typing.Optional[int] = None, no_wrap: bool = False):
+        dialog = self.pop_up
+        filter_text = dialog.filter_text
+        if not filter_text:
+            return
+
+        if dialog.last_complete_pos is not None:
+            dialog.complete_widget_at_pos(dialog.last_complete_pos).unhighlight()
+
+        position = self.autocomplete_index.next_match(
+            filter_text,
+            dialog.focus_position,
+            step or 0,
+            anywhere=dialog.complete_anywhere,
+        )
+        if position is not None:
+            widget = dialog.complete_widget_at_pos(position)
+            # Matches on the English side, or on another spelling of an umlaut, aren't in the label to highlight.
+            highlight_at = str(widget).casefold().find(filter_text.casefold())
+            if highlight_at >= 0:
+                widget.highlight(highlight_at, highlight_at + len(filter_text))
+            dialog.last_complete_pos = position
+            dialog.complete_set_focus(position)
+
+        dialog.last_filter_text = filter_text
+
+
+class WordLists:
+    """
+    The nouns and verbs the dropdowns offer, sorted by their German, with their auto-complete indexes.
+    """
+
+    def __init__(self, bank_nouns: typing.Iterable[BankNoun], bank_verbs: typing.Iterable[Verb]):
+        self.nouns = sorted(bank_nouns, key=operator.attrgetter('german_word_singular'))
+        self.verbs = sorted(bank_verbs, key=operator.attrgetter('german_word'))
+        self.noun_labels = [noun.german_word_singular for noun in self.nouns]
+        self.verb_labels = [verb.german_word for verb in self.verbs]
+        # Words can be completed from their German or English, with or without umlauts.
+        self.noun_index = AutocompleteIndex([bank_word_search_texts(noun) for noun in self.nouns])
+        self.verb_index = AutocompleteIndex([bank_word_search_texts(verb) for verb in self.verbs])
+
+    def for_position(self, position: str) -> typing.Tuple[typing.List[BankWord], typing.List[str], AutocompleteIndex]:
+        """
+        The words, their labels and their index for the dropdown at a sentence position (subject, verb or object).
+        """
+        if position == 'verb':
+            return self.verbs, self.verb_labels, self.verb_index
+        return self.nouns, self.noun_labels, self.noun_index
+
+    def position_of(self, position: str, word: BankWord) -> typing.Optional[int]:
+        words, labels, _ = self.for_position(position)
+        label = word.german_word if isinstance(word, Verb) else word.german_word_singular
+
+        index = bisect.bisect_left(labels, label)
+        while index < len(labels) and labels[index] == label:
+            if words[index] == word:
+                return index
+            index += 1
+        return None
+
+
+class BackgroundBankLoader(threading.Thread):
+    """
+    Loads the bank in a daemon thread, so the TUI can start straight away: from `snapshot`, if given, then from Notion,
+    if given `client_options` for a `GermanBankNotionClient` (the client, and its cache at `cache_filename`, are opened
+    on this thread, as SQLite connections can't be shared between threads).
+
+    Whenever it has new words, it builds their word lists (sorting and indexing a big bank takes a while, so not on the
+    UI thread) for `take_word_lists` to return, and calls `notify`. While loading from Notion, that's every
+    `publish_interval` seconds, unless it started from a snapshot: a partial bank would replace the whole one from the
+    snapshot until the load is done. A successful load from Notion is written to `snapshot`, for the next run to start
+    from.
+    """
+
+    def __init__(
+        self,
+        notify: typing.Callable[[], None],
+        snapshot: typing.Optional[str] = None,
+        client_options: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        cache_filename: typing.Optional[str] = None,
+        publish_interval: float = BANK_PUBLISH_INTERVAL,
+    ):
+        super().__init__(daemon=True)
+        self._notify = notify
+        self._snapshot = snapshot
+        self._client_options = client_options
+        self._cache_filename = cache_filename
+        self._publish_interval = publish_interval
+        self._client: typing.Optional[GermanBankNotionClient] = None
+        self._lock = threading.Lock()
+        self._word_lists: typing.Optional[typing.Tuple[WordLists, str]] = None
+        self.done = False
+        self.error: typing.Optional[Exception] = None
+
+    @property
+    def load_report(self) -> LoadReport:
+        return self._client.load_report if self._client is not None else LoadReport()
+
+    def describe_progress(self) -> str:
+        if self._client is None:
+            return f"Reading the snapshot {self._snapshot}..."
+        return f"Loading the bank from Notion: {self.load_report.rows:,} rows so far..."
+
+    def run(self) -> None:
+        try:
+            progressive = True
+            if self._snapshot and os.path.exists(self._snapshot):
+                bank = GermanBank.read_snapshot(self._snapshot)
+                age = describe_age(time.time() - os.path.getmtime(self._snapshot))
+                self._publish(bank.nouns, bank.verbs, f"snapshot {self._snapshot} ({age})", done=not self._client_options)
+                progressive = not len(bank)
+
+            if self._client_options:
+                self._load_from_notion(progressive)
+        except Exception as e:
+            self.error = e
+            self._notify()
+
+    def _load_from_notion(self, progressive: bool) -> None:
+        cache = NotionQueryCache(self._cache_filename) if self._cache_filename else None
+        try:
+            with GermanBankNotionClient(cache=cache, **self._client_options) as client:
+                self._client = client
+                items = []
+                published_at = time.monotonic()
+
+                for item in client.load_bank_items():
+                    items.append(item)
+                    if time.monotonic() - published_at >= self._publish_interval:
+                        if progressive:
+                            self._publish_items(items, "Notion so far")
+                        else:
+                            self._notify()
+                        published_at = time.monotonic()
+
+                if self._snapshot:
+                    GermanBank(items).write_snapshot(self._snapshot)
+                self._publish_items(items, "Notion", done=True)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    def _publish_items(self, items: typing.List[typing.Any], source: str, done: bool = False) -> None:
+        self._publish(
+            [item for item in items if isinstance(item, BankNoun)],
+            [item for item in items if isinstance(item, Verb)],
+            source,
+            done,
+        )
+
+    def _publish(
+        self,
+        bank_nouns: typing.List[BankNoun],
+        bank_verbs: typing.List[Verb],
+        source: str,
+        done: bool = False,
+    ) -> None:
+        word_lists = WordLists(bank_nouns, bank_verbs)
+        with self._lock:
+            self._word_lists = word_lists, source
+            # Set along with the final word lists, so they're there to take once `done` is seen.
+            self.done = done
+        self._notify()
+
+    def take_word_lists(self) -> typing.Optional[typing.Tuple[WordLists, str]]:
+        """
+        The latest word lists and where their words came from, if there are new ones since the last call.
+        """
+        with self._lock:
+            word_lists, self._word_lists = self._word_lists, None
+        return word_lists
+
+
+def describe_age(seconds: float) -> str:
+    for unit, unit_seconds in [("day", 86400), ("hour", 3600), ("minute", 60)]:
+        if seconds >= unit_seconds:
+            count = int(seconds // unit_seconds)
+            return f"{count} {unit}{'s' if count > 1 else ''} old"
+    return "just saved"
 
 
 @click.command()
@@ -62,7 +283,6 @@ class TestDropdown(KeymapMovementMixin, Dropdown):
     "--token",
     type=str,
     help="Get from token_v2 value stored in www.notion.so cookies. Link: chrome://settings/cookies/detail?site=www.notion.so",
-    required=True,
     envvar="NOTION_API_TOKEN",
 )
 @click.option(
@@ -70,16 +290,60 @@ class TestDropdown(KeymapMovementMixin, Dropdown):
     type=str,
     default="play.apkg",
 )
-def play(token: str, output_filename: str):
-    notion_client = GermanBankNotionClient(token)
-    bank_nouns = sorted([noun for noun in notion_client.get_bank_nouns()])
-    bank_verbs = sorted([verb for verb in notion_client.get_bank_verbs()])
-
-    # bank_nouns = sorted(BANK_NOUNS)
-    # bank_verbs = sorted(BANK_VERBS)
-
-    nouns = [noun.german_word_singular for noun in bank_nouns]
-    verbs = [verb.german_word for verb in bank_verbs]
+@click.option("--online/--offline", default=True, help="Offline runs use --snapshot, or a few built-in words without one.")
+@click.option(
+    "--snapshot",
+    type=str,
+    help="Bank snapshot file written by export-bank. Online runs start from it while the bank loads, and refresh it.",
+)
+@click.option(
+    "--database-id",
+    "databases",
+    type=str,
+    multiple=True,
+    callback=parse_database_ids,
+    help=DATABASE_ID_HELP,
+)
+@click.option(
+    "--cache-filename",
+    type=str,
+    default="notion_cache.sqlite3",
+    help="SQLite file caching the Notion database between runs, so only edited rows are downloaded.",
+)
+@click.option("--cache/--no-cache", default=True, help="Use the local Notion cache.")
+@click.option("--full-refresh", is_flag=True, default=False, help="Re-download the whole Notion database into the cache.")
+@click.option(
+    "--prune-deleted",
+    is_flag=True,
+    default=False,
+    help="Lists every Notion page to drop rows deleted since the last sync from the cache, rather than waiting for its "
+    "weekly full refresh.",
+)
+def play(
+    token: str,
+    output_filename: str,
+    online: bool,
+    snapshot: str,
+    databases: typing.Dict[str, str],
+    cache_filename: str,
+    cache: bool,
+    full_refresh: bool,
+    prune_deleted: bool,
+):
+    if online and not token:
+        raise click.UsageError("Missing --token")
+    if not online and snapshot and not os.path.exists(snapshot):
+        raise click.UsageError(f"No snapshot at {snapshot}")
+
+    # The bank is read (and its word lists built) in the background, so the TUI starts straight away.
+    if online or snapshot:
+        word_lists = WordLists([], [])
+        source = "nothing yet"
+    else:
+        word_lists = WordLists(BANK_NOUNS, BANK_VERBS)
+        source = "the built-in words"
+    # New word lists from the background load wait here while a dropdown is open.
+    pending_word_lists: typing.List[WordLists] = []
 
     entries = Dropdown.get_palette_entries()
     entries.update(ScrollingListBox.get_palette_entries())
@@ -87,93 +351,167 @@ def play(token: str, output_filename: str):
     screen = urwid.raw_display.Screen()
     screen.set_terminal_properties(256)
 
-    subject = TestDropdown(
-        items=nouns,
-        # label="nouns",
-        scrollbar=True,
-        auto_complete=True,
-        left_chars=' ',
-        right_chars=' ',
-    )
-
-    verb = TestDropdown(
-        items=verbs,
-        # label="verbs",
-        scrollbar=True,
-        auto_complete=True,
-        left_chars=' ',
-        right_chars=' ',
-    )
-
-    object_ = TestDropdown(
-        items=nouns,
-        # label="nouns",
-        scrollbar=True,
-        auto_complete=True,
-        left_chars=' ',
-        right_chars=' ',
-    )
-
-    boxes = [subject, verb, object_]
-    boxes_grid = urwid.Columns(boxes)
+    def make_dropdown(position: str) -> TestDropdown:
+        _, labels, index = word_lists.for_position(position)
+        dropdown = TestDropdown(
+            items=labels,
+            autocomplete_index=index,
+            # label="nouns",
+            scrollbar=True,
+            auto_complete=True,
+            left_chars=' ',
+            right_chars=' ',
+        )
+        urwid.connect_signal(dropdown.pop_up, "select", refresh_all_sentences)
+        urwid.connect_signal(dropdown.pop_up, "close", lambda _: apply_pending_word_lists())
+        return dropdown
+
+    def selected_word(position: str) -> typing.Optional[BankWord]:
+        words, _, _ = word_lists.for_position(position)
+        value = boxes[BLANK_POSITIONS.index(position)].selected_value
+        return None if value is None else words[value]
+
+    # One dropdown per sentence position, in the order of BLANK_POSITIONS (subject, verb, object).
+    boxes: typing.List[TestDropdown] = []
+    boxes_grid = urwid.Columns([])
     blank_it = {"blanked": "verb"}  # Lazy hack to make this accessible within sub method
 
     def add_sentence_to_deck(basic_sentence: BasicSentence, blank_it: str, _):
         deck.add_note(basic_sentence.to_anki_note(blank_it))
 
-    def generate_all_sentences_as_buttons() -> typing.List[urwid.Button]:
+    # Each word's variants are declined (and the verb conjugated for each subject variant) once per word, so changing
+    # one dropdown only renders the word that changed, and the others' forms are reused.
+    @functools.lru_cache(maxsize=RENDERED_WORDS_CACHE_SIZE)
+    def subject_forms(subject_noun: BankNoun, verb_: Verb) -> typing.List[typing.Tuple[Noun, str, str]]:
         return [
-            urwid.Button(
-                label=f"{basic_sentence.get_question_sentence(blank_it['blanked'])} | {basic_sentence.get_answer_sentence()}",
-                on_press=functools.partial(add_sentence_to_deck, basic_sentence, blank_it['blanked']),
+            (
+                subject,
+                subject.make_str(case=GermanCase.NOMINATIVE),
+                verb_.conjugate(subject.perspective, subject.cardinality),
             )
-            for basic_sentence in generate_all_sentences()
+            for subject in noun_variants(subject_noun)
         ]
 
-    def generate_all_sentences() -> typing.List[BasicSentence]:
-        subject2 = bank_nouns[subject.selected_value].random_noun().first()
-        verb2 = bank_verbs[verb.selected_value]
-        object2 = bank_nouns[object_.selected_value].random_noun().first()
-        res = []
+    @functools.lru_cache(maxsize=RENDERED_WORDS_CACHE_SIZE)
+    def object_forms(object_noun: BankNoun, case: GermanCase) -> typing.List[typing.Tuple[Noun, str]]:
+        return [(object_, object_.make_str(case=case)) for object_ in noun_variants(object_noun)]
+
+    def sentences_for(
+        subject_noun: BankNoun,
+        verb_: Verb,
+        object_noun: BankNoun,
+    ) -> typing.List[typing.Tuple[BasicSentence, RenderedSentence]]:
+        """
+        Every variant of the selected words' sentence, in `SentenceSpace` order (the subject varies fastest).
+        """
+        sentences = []
+        for object_, object_str in object_forms(object_noun, verb_.requires_case):
+            for subject, subject_str, verb_str in subject_forms(subject_noun, verb_):
+                basic_sentence = BasicSentence(subject=subject, verb=verb_, object_=object_)
+                sentences.append((basic_sentence, RenderedSentence(basic_sentence, subject_str, verb_str, object_str)))
+        return sentences
+
+    # The buttons are kept for the most recent selections, so going back to one (or only moving the blank) doesn't
+    # build them again.
+
+    @functools.lru_cache(maxsize=RENDERED_SELECTIONS_CACHE_SIZE)
+    def sentence_buttons_for(
+        subject_noun: BankNoun,
+        verb_: Verb,
+        object_noun: BankNoun,
+        blanked: str,
+    ) -> typing.List[urwid.Button]:
+        return [
+            urwid.Button(
+                label=f"{rendered.question(blanked)} | {rendered.answer}",
+                on_press=functools.partial(add_sentence_to_deck, basic_sentence, blanked),
+            )
+            for basic_sentence, rendered in sentences_for(subject_noun, verb_, object_noun)
+        ]
 
-        while True:
-            basic_sentence = BasicSentence(subject2, verb2, object2)
-            res.append(basic_sentence)
-            
-            try:
-                try:
-                    subject2 = subject2.rotate()
-                except StopIteration:
-                    subject2 = subject2.first()
-                    object2 = object2.rotate()
-            except StopIteration:
-                break
-        
-        return res
+    def generate_all_sentences_as_buttons() -> typing.List[urwid.Button]:
+        selected_words = [selected_word(position) for position in BLANK_POSITIONS]
+        if None in selected_words:
+            # The bank has no nouns or verbs (yet).
+            return []
+        return sentence_buttons_for(*selected_words, blank_it['blanked'])
 
     deck = genanki.Deck(
         deck_id=1878326705,  # Hard-coded value selected by me
         name="German::Grammar",
     )
 
-    sentence_list = urwid.Pile(generate_all_sentences_as_buttons())
+    sentence_list = urwid.Pile([])
 
     def refresh_all_sentences(_, __):
-        sentence_list.widget_list = generate_all_sentences_as_buttons()
-
-    urwid.connect_signal(subject.pop_up, "select", refresh_all_sentences)
-    urwid.connect_signal(verb.pop_up, "select", refresh_all_sentences)
-    urwid.connect_signal(object_.pop_up, "select", refresh_all_sentences)
+        # Setting `widget_list` fails while the pile is empty, as it is until the bank has nouns and verbs.
+        sentence_list.contents[:] = [(button, sentence_list.options()) for button in generate_all_sentences_as_buttons()]
+
+    status = urwid.Text("")
+    loader: typing.Optional[BackgroundBankLoader] = None
+
+    def refresh_status() -> None:
+        words = f"{len(word_lists.nouns):,} nouns and {len(word_lists.verbs):,} verbs from {source}"
+        if loader is None or loader.done:
+            status.set_text(words)
+        elif loader.error is not None:
+            status.set_text(f"{words}. Loading the bank failed: {loader.error}")
+        else:
+            status.set_text(f"{words}. {loader.describe_progress()}")
+
+    def set_word_lists(new_word_lists: WordLists) -> None:
+        """
+        Rebuilds the dropdowns over new word lists, keeping the selected words where they're still in the bank.
+        """
+        nonlocal word_lists
+        selected_words = [selected_word(position) for position in BLANK_POSITIONS] if boxes else [None] * 3
+        word_lists = new_word_lists
+
+        for box_index, (position, word) in enumerate(zip(BLANK_POSITIONS, selected_words)):
+            box = make_dropdown(position)
+            selected_index = word_lists.position_of(position, word) if word is not None else None
+            if selected_index is not None:
+                box.focus_position = selected_index
+
+            if box_index < len(boxes):
+                boxes[box_index] = box
+                boxes_grid.contents[box_index] = (box, boxes_grid.options())
+            else:
+                boxes.append(box)
+                boxes_grid.contents.append((box, boxes_grid.options()))
+
+        refresh_all_sentences(None, None)
+        refresh_status()
+
+    def apply_pending_word_lists() -> None:
+        if pending_word_lists:
+            set_word_lists(pending_word_lists.pop())
+
+    def on_bank_loading(_) -> bool:
+        nonlocal source
+        new_word_lists = loader.take_word_lists()
+        if new_word_lists is not None:
+            new_word_lists, source = new_word_lists
+            pending_word_lists[:] = [new_word_lists]
+            # Rebuilding a dropdown would close it under the user, so that waits until it's closed.
+            if not any(box.is_open for box in boxes):
+                apply_pending_word_lists()
+        refresh_status()
+        # The pipe stays watched: stopping would close its read end while the loader may still write to it.
+        return True
+
+    set_word_lists(word_lists)
 
     pile = urwid.Pile([boxes_grid, sentence_list])
-    main = urwid.Frame(urwid.Filler(pile, valign=urwid.widget.TOP))
+    main = urwid.Frame(urwid.Filler(pile, valign=urwid.widget.TOP), footer=status)
 
     def global_input(key):
         if key in ('q', 'Q'):
             raise urwid.ExitMainLoop()
         elif key == 'R':
             for box in boxes:
-                box.select_value(random.randint(0, len(box.values)-1))
+                if len(box):
+                    box.select_value(random.randint(0, len(box.values)-1))
 
             refresh_all_sentences(None, None)
         elif key == 'r':
@@ -182,7 +520,7 @@ def play(token: str, output_filename: str):
             except IndexError:
                 pass
 
-            if focused_box in boxes:
+            if focused_box in boxes and len(focused_box):
                 focused_box.select_value(random.randint(0, len(focused_box.values)-1))
 
             refresh_all_sentences(None, None)
@@ -192,12 +530,8 @@ def play(token: str, output_filename: str):
             except IndexError:
                 pass
             else:
-                if focused_box == subject:
-                    blank_it["blanked"] = "subject"
-                elif focused_box == verb:
-                    blank_it["blanked"] = "verb"
-                elif focused_box == object_:
-                    blank_it["blanked"] = "object"
+                if focused_box in boxes:
+                    blank_it["blanked"] = BLANK_POSITIONS[boxes.index(focused_box)]
 
             refresh_all_sentences(None, None)
         else:
@@ -211,7 +545,35 @@ def play(token: str, output_filename: str):
         pop_ups=True,
     )
 
-    loop.run()
+    if online or snapshot:
+        notify_fd = loop.watch_pipe(on_bank_loading)
+        client_options = None
+        if online:
+            client_options = dict(
+                token=token,
+                database_ids=list(databases),
+                source_names=databases,
+                full_refresh=full_refresh,
+                prune_deleted=prune_deleted,
+            )
+        loader = BackgroundBankLoader(
+            notify=lambda: os.write(notify_fd, b"."),
+            snapshot=snapshot,
+            client_options=client_options,
+            cache_filename=cache_filename if cache else None,
+        )
+        loader.start()
+        refresh_status()
+
+    # Log messages would be drawn over the TUI; the load's summary is logged once it's closed.
+    logging.disable(logging.WARNING)
+    try:
+        loop.run()
+    finally:
+        logging.disable(logging.NOTSET)
+
+    if loader is not None and loader.done:
+        loader.load_report.log()
 
     if deck.notes:
         genanki.Package([deck]).write_to_file(output_filename)
@@ -0,0 +1,61 @@
+import threading
+import time
+import typing
+
+
+class TokenBucket:
+    """
+    Paces requests to `rate` per second, allowing bursts of up to `capacity`.
+
+    The rate adapts to the server: `slow_down` halves it whenever we're rate limited, and every successful request
+    nudges it back up towards `max_rate`.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        min_rate: float = 0.25,
+        clock: typing.Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._clock = clock
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        """
+        Takes a token, returning how many seconds the caller must wait before using it.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def slow_down(self, retry_after: typing.Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                # Nothing more may be sent until the server's requested pause is over.
+                self._refill()
+                self._tokens = min(self._tokens, 0) - retry_after * self.rate
+
+    def speed_up(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + 0.1 * self.max_rate)
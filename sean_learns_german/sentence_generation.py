@@ -0,0 +1,301 @@
+import functools
+import random
+import typing
+
+import genanki
+
+from sean_learns_german.constants import ArticleType, Cardinality, GermanCase, NounGender, PronounType, SpeechPerspective
+from sean_learns_german.models.basic_sentence import BLANK_POSITIONS, BasicSentence
+from sean_learns_german.models.genanki_models import GENANKI_GRAMMAR_MODEL_V2, GermanNote
+from sean_learns_german.models.german_models import BankNoun, Noun, Pronoun, Verb
+from sean_learns_german.pipeline import parallel_map
+
+
+Subject = typing.Union[Noun, Pronoun]
+T = typing.TypeVar('T')
+
+
+def noun_variants(bank_noun: BankNoun) -> typing.List[Noun]:
+    """
+    Every article type and cardinality of a noun, article type first, in `Noun.rotate` order. Nouns without a plural
+    only have singular variants.
+    """
+    cardinalities = list(Cardinality) if bank_noun.german_word_plural else [Cardinality.SINGULAR]
+
+    return [
+        Noun(
+            german_word_singular=bank_noun.german_word_singular,
+            german_word_plural=bank_noun.german_word_plural,
+            english_word=bank_noun.english_word,
+            english_synonyms=bank_noun.english_synonyms,
+            gender=bank_noun.gender,
+            article_type=article_type,
+            perspective=SpeechPerspective.THIRD_PERSON,
+            cardinality=cardinality,
+            tags=bank_noun.tags,
+            notion_id=bank_noun.notion_id,
+        )
+        for cardinality in cardinalities
+        for article_type in ArticleType
+    ]
+
+
+def pronoun_variants() -> typing.List[Pronoun]:
+    """
+    Every personal pronoun, perspective first, in `Pronoun.rotate` order. The third-person singular comes in each gender
+    rather than a random one.
+    """
+    return [
+        Pronoun(
+            pronoun_type=PronounType.PERSONAL,
+            perspective=perspective,
+            gender=gender,
+            cardinality=cardinality,
+        )
+        for cardinality in Cardinality
+        for perspective in SpeechPerspective
+        for gender in (
+            NounGender
+            if perspective == SpeechPerspective.THIRD_PERSON and cardinality == Cardinality.SINGULAR
+            else [None]
+        )
+    ]
+
+
+class SentenceSpace:
+    """
+    Every subject variant x verb x object variant sentence, built on demand from its index. The subject varies fastest,
+    then the verb, then the object.
+    """
+
+    def __init__(
+        self,
+        subjects: typing.Sequence[Subject],
+        verbs: typing.Sequence[Verb],
+        objects: typing.Sequence[Noun],
+    ):
+        self.subjects = subjects
+        self.verbs = verbs
+        self.objects = objects
+
+    @classmethod
+    def from_words(
+        cls,
+        subject_nouns: typing.Iterable[BankNoun],
+        verbs: typing.Sequence[Verb],
+        object_nouns: typing.Iterable[BankNoun],
+        pronouns: bool = True,
+    ) -> 'SentenceSpace':
+        """
+        With `pronouns`, the personal pronouns are subjects too.
+        """
+        subjects: typing.List[Subject] = pronoun_variants() if pronouns else []
+        for bank_noun in subject_nouns:
+            subjects.extend(noun_variants(bank_noun))
+
+        objects = [noun for bank_noun in object_nouns for noun in noun_variants(bank_noun)]
+
+        return cls(subjects, verbs, objects)
+
+    def __len__(self) -> int:
+        return len(self.subjects) * len(self.verbs) * len(self.objects)
+
+    def __getitem__(self, index: int) -> BasicSentence:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('sentence index out of range')
+
+        rest, subject_index = divmod(index, len(self.subjects))
+        object_index, verb_index = divmod(rest, len(self.verbs))
+
+        return BasicSentence(
+            subject=self.subjects[subject_index],
+            verb=self.verbs[verb_index],
+            object_=self.objects[object_index],
+        )
+
+    def __iter__(self) -> typing.Iterator[BasicSentence]:
+        return self.iter_from(0)
+
+    def iter_from(self, offset: int) -> typing.Generator[BasicSentence, None, None]:
+        """
+        Resumes enumerating the space from `offset`.
+        """
+        for index in range(offset, len(self)):
+            yield self[index]
+
+    def sample(self, k: int, rng: random.Random = random) -> typing.Generator[BasicSentence, None, None]:
+        """
+        `k` distinct sentences, picked uniformly. Only the `k` indexes are held in memory, not the space.
+        """
+        return self.at(self.sample_indexes(k, rng))
+
+    def sample_indexes(self, k: int, rng: random.Random = random) -> typing.List[int]:
+        return rng.sample(range(len(self)), k)
+
+    def at(self, indexes: typing.Iterable[int]) -> typing.Generator[BasicSentence, None, None]:
+        for index in indexes:
+            yield self[index]
+
+
+def filter_words(
+    nouns: typing.List[BankNoun],
+    verbs: typing.List[Verb],
+    tags: typing.Sequence[str] = (),
+    cases: typing.Sequence[GermanCase] = (),
+) -> typing.Tuple[typing.List[BankNoun], typing.List[Verb]]:
+    """
+    Keeps the nouns and verbs carrying every tag in `tags`, and the verbs requiring one of `cases` (if given).
+    """
+    nouns = [noun for noun in nouns if all(tag in noun.tags for tag in tags)]
+    verbs = [
+        verb
+        for verb in verbs
+        if all(tag in verb.tags for tag in tags) and (not cases or verb.requires_case in cases)
+    ]
+    return nouns, verbs
+
+
+def shuffled_range(size: int, rng: random.Random = random) -> typing.Generator[int, None, None]:
+    """
+    Every number below `size` once, in a random order. The permutation is drawn lazily, by a Fisher-Yates shuffle that
+    only remembers the positions it swapped, so taking the first few of a huge range is cheap.
+    """
+    swapped: typing.Dict[int, int] = {}
+
+    for position in range(size):
+        other = rng.randrange(position, size)
+        yield swapped.get(other, other)
+        swapped[other] = swapped.pop(position, position)
+
+
+def sentence_indexes(
+    space: SentenceSpace,
+    shuffle: bool = False,
+    seed: typing.Optional[int] = None,
+    shard: int = 0,
+    shard_count: int = 1,
+) -> typing.Iterator[int]:
+    """
+    The indexes of the space's `shard`th of `shard_count` disjoint slices (every `shard_count`th index from the
+    `shard`th on), in order, or shuffled by a `seed`ed RNG. The shards of a run never share a sentence, so each one only
+    renders its own share.
+    """
+    if not 0 <= shard < shard_count:
+        raise ValueError(f"Shard {shard} out of range for {shard_count} shards")
+
+    indexes = range(shard, len(space), shard_count)
+    if not shuffle:
+        return iter(indexes)
+
+    return (indexes[position] for position in shuffled_range(len(indexes), random.Random(seed)))
+
+
+def shard_size(total: int, shard: int, shard_count: int) -> int:
+    """
+    The `shard`th of `shard_count` near-equal shares of `total`, which add up to `total`.
+    """
+    return total // shard_count + (shard < total % shard_count)
+
+
+NoteContent = typing.Tuple[typing.List[str], typing.List[str]]
+
+
+def sentence_notes(
+    sentences: typing.Iterable[BasicSentence],
+    blank_positions: typing.Sequence[str] = BLANK_POSITIONS,
+) -> typing.Generator[GermanNote, None, None]:
+    """
+    A note per blank position of each sentence.
+    """
+    for basic_sentence in sentences:
+        for blank_it in blank_positions:
+            yield basic_sentence.to_anki_note(blank_it)
+
+
+def _sentence_note_contents(
+    nouns: typing.List[BankNoun],
+    verbs: typing.List[Verb],
+    blank_positions: typing.Sequence[str],
+    indexes: typing.List[int],
+) -> typing.List[typing.List[NoteContent]]:
+    """
+    The fields and tags of the notes of each index of the nouns' and verbs' sentence space. This is what process pool
+    workers run: the words and indexes pickle cheaply, and so do the results, unlike genanki notes and their model.
+    """
+    space = SentenceSpace.from_words(nouns, verbs, nouns)
+    return [
+        [(note.fields, note.tags) for note in sentence_notes([space[index]], blank_positions)]
+        for index in indexes
+    ]
+
+
+def parallel_sentence_notes(
+    nouns: typing.List[BankNoun],
+    verbs: typing.List[Verb],
+    indexes: typing.Iterable[int],
+    blank_positions: typing.Sequence[str] = BLANK_POSITIONS,
+    jobs: int = 1,
+    chunk_size: int = 2000,
+) -> typing.Generator[GermanNote, None, None]:
+    """
+    `sentence_notes` of the sentences at `indexes` of the nouns' and verbs' sentence space, in order, rendered in a
+    pool of `jobs` processes. `indexes` is consumed a few chunks ahead of the notes.
+    """
+    if jobs <= 1:
+        yield from sentence_notes(SentenceSpace.from_words(nouns, verbs, nouns).at(indexes), blank_positions)
+        return
+
+    render = functools.partial(_sentence_note_contents, nouns, verbs, blank_positions)
+    for _, contents in parallel_map(render, indexes, jobs, chunk_size):
+        for fields, tags in contents:
+            yield GermanNote(model=GENANKI_GRAMMAR_MODEL_V2, fields=fields, tags=tags)
+
+
+def distinct_notes(
+    notes: typing.Iterable[GermanNote],
+    limit: typing.Optional[int] = None,
+) -> typing.Generator[GermanNote, None, None]:
+    """
+    The first `limit` notes with distinct questions, skipping repeats (a note is identified by its question, so two
+    notes asking the same thing would collide in Anki). The questions seen so far are kept, so this only dedupes within
+    a shard; `merge-shards` drops the repeats between shards.
+    """
+    seen_questions: typing.Set[str] = set()
+
+    for note in notes:
+        if limit is not None and len(seen_questions) >= limit:
+            return
+        if note.fields[0] in seen_questions:
+            continue
+
+        seen_questions.add(note.fields[0])
+        yield note
+
+
+def interleave_shards(shards: typing.Sequence[typing.Iterable[T]]) -> typing.Generator[T, None, None]:
+    """
+    Merges the notes of every shard of a run, given in shard order, taking one from each shard in turn.
+    """
+    iterators = [iter(shard) for shard in shards]
+
+    while iterators:
+        for iterator in list(iterators):
+            try:
+                yield next(iterator)
+            except StopIteration:
+                iterators.remove(iterator)
+
+
+def unique_guids(notes: typing.Iterable[genanki.Note]) -> typing.Generator[genanki.Note, None, None]:
+    """
+    Skips notes whose GUID was already seen, e.g. the same question asked by sentences in two shards.
+    """
+    seen_guids: typing.Set[str] = set()
+
+    for note in notes:
+        if note.guid not in seen_guids:
+            seen_guids.add(note.guid)
+            yield note
@@ -0,0 +1,114 @@
+import dataclasses
+import re
+import typing
+
+from sean_learns_german.constants import PartsOfSpeech
+from sean_learns_german.models.german_models import BankNoun, BankVocabulary, BankWord, Verb
+
+
+_SYNONYM_SEPARATORS = re.compile(r'[,;/]')
+
+
+def normalize_english(english: str) -> str:
+    return ' '.join(english.casefold().split())
+
+
+def part_of_speech_of(bank_word: BankWord) -> str:
+    if isinstance(bank_word, BankNoun):
+        return PartsOfSpeech.NOUN.value
+    elif isinstance(bank_word, Verb):
+        return PartsOfSpeech.VERB.value
+    return bank_word.part_of_speech or ""
+
+
+def english_meanings(bank_word: BankWord) -> typing.List[str]:
+    """
+    The English word and synonyms of a bank word. Synonyms are separated by commas, semicolons or slashes.
+    """
+    meanings = [bank_word.english_word or "", *_SYNONYM_SEPARATORS.split(bank_word.english_synonyms or "")]
+    return [meaning.strip() for meaning in meanings if meaning.strip()]
+
+
+@dataclasses.dataclass(unsafe_hash=True)
+class SynonymGroup:
+    """
+    Bank words of one part of speech that share an English word. They make a single one-to-N note.
+    """
+    __slots__ = ('part_of_speech', 'bank_words')
+
+    part_of_speech: str
+    bank_words: typing.Tuple[BankWord, ...]
+
+    def german_answers(self) -> typing.List[str]:
+        return [
+            f"{bank_word.gender.value} {bank_word.german_word_singular}" if isinstance(bank_word, BankNoun)
+            else bank_word.german_word if isinstance(bank_word, Verb)
+            else bank_word.german
+            for bank_word in self.bank_words
+        ]
+
+    def english_meanings(self) -> typing.List[str]:
+        """
+        The English meanings every word of the group shares, in the first word's order, starting with their common
+        English word. A meaning only some of the words have would make the note's answer wrong for the others.
+        """
+        first_word, *other_words = self.bank_words
+        shared = set.intersection(
+            {normalize_english(meaning) for meaning in english_meanings(first_word)},
+            *({normalize_english(meaning) for meaning in english_meanings(bank_word)} for bank_word in other_words),
+        )
+
+        meanings: typing.Dict[str, str] = {}
+        for meaning in english_meanings(first_word):
+            if normalize_english(meaning) in shared:
+                meanings.setdefault(normalize_english(meaning), meaning)
+        return list(meanings.values())
+
+
+class SynonymIndex:
+    """
+    Groups the nouns, verbs and vocabulary that share a normalized (part of speech, English word) key, hashing each word
+    by its key so building takes linear time rather than comparing words pairwise. Other bank items (phrases) are never
+    grouped.
+
+    Only the English word groups: words aren't chained together through their synonyms, or "leicht" (light, easy) and
+    "hell" (light, bright) would pull in "einfach" (easy) and "klug" (bright) too.
+    """
+
+    def __init__(self, items: typing.Iterable[typing.Any]):
+        self.items = list(items)
+
+        positions_by_key: typing.Dict[typing.Tuple[str, str], typing.List[int]] = {}
+
+        for position, bank_word in enumerate(self.items):
+            if not isinstance(bank_word, (BankNoun, BankVocabulary, Verb)):
+                continue
+
+            if bank_word.english_word and bank_word.english_word.strip():
+                key = (part_of_speech_of(bank_word), normalize_english(bank_word.english_word))
+                positions_by_key.setdefault(key, []).append(position)
+
+        self.groups: typing.List[SynonymGroup] = []
+        # Position of each grouped word -> its group.
+        self._group_at: typing.Dict[int, SynonymGroup] = {}
+
+        for positions in positions_by_key.values():
+            if len(positions) > 1:
+                group = SynonymGroup(
+                    part_of_speech=part_of_speech_of(self.items[positions[0]]),
+                    bank_words=tuple(self.items[position] for position in positions),
+                )
+                self.groups.append(group)
+                for position in positions:
+                    self._group_at[position] = group
+
+    def merged(self) -> typing.Generator[typing.Any, None, None]:
+        """
+        The indexed items in order, with each group replacing its words at the position of its first one.
+        """
+        for position, item in enumerate(self.items):
+            group = self._group_at.get(position)
+            if group is None:
+                yield item
+            elif group.bank_words[0] is item:
+                yield group
@@ -9,7 +9,8 @@ BANK_NOUNS = [
         english_word="man",
         english_synonyms="",
         gender=NounGender.MASCULINE,
-        tags=[],
+        tags=(),
+        notion_id=None,
     ),
     BankNoun(
         german_word_singular="Frau",
@@ -17,7 +18,8 @@ BANK_NOUNS = [
         english_word="woman",
         english_synonyms="",
         gender=NounGender.FEMININE,
-        tags=[],
+        tags=(),
+        notion_id=None,
     ),
     BankNoun(
         german_word_singular="Angebot",
@@ -25,7 +27,8 @@ BANK_NOUNS = [
         english_word="agreement",
         english_synonyms="",
         gender=NounGender.NEUTER,
-        tags=[],
+        tags=(),
+        notion_id=None,
     ),
 ]
 
@@ -41,7 +44,8 @@ BANK_VERBS = [
         conj_wir_1pp="haben",
         conj_ihr_2pp="habt",
         conj_sie_3pp="haben",
-        tags=[],
+        tags=(),
+        notion_id=None,
     ),
     Verb(
         german_word="sehen",
@@ -54,7 +58,8 @@ BANK_VERBS = [
         conj_wir_1pp="sehen",
         conj_ihr_2pp="seht",
         conj_sie_3pp="sehen",
-        tags=[],
+        tags=(),
+        notion_id=None,
     ),
     Verb(
         german_word="sein",
@@ -67,6 +72,7 @@ BANK_VERBS = [
         conj_wir_1pp="sind",
         conj_ihr_2pp="seid",
         conj_sie_3pp="sind",
-        tags=[],
+        tags=(),
+        notion_id=None,
     ),
 ]
@@ -0,0 +1,112 @@
+"""
+A local stand-in for Notion's database query endpoint, so the clients can be tested without the network.
+
+    with NotionStub({'bank': [phrase_page(i) for i in range(250)]}) as stub:
+        client = GermanBankNotionClient("token", database_ids=['bank'], api_url=stub.url)
+"""
+import dataclasses
+import http.server
+import json
+import threading
+import typing
+import urllib.parse
+
+
+def _rich_text(property_type: str, text: str) -> dict:
+    return {property_type: [{'type': 'text', 'plain_text': text, 'text': {'content': text}}], 'type': property_type}
+
+
+def phrase_page(index: int, last_edited_time: str = "2024-01-01T00:00:00.000Z") -> dict:
+    return {
+        'object': 'page',
+        'id': f"page-{index}",
+        'created_time': "2024-01-01T00:00:00.000Z",
+        'last_edited_time': last_edited_time,
+        'archived': False,
+        'properties': {
+            'German': _rich_text('title', f"Satz {index}"),
+            'English': _rich_text('rich_text', f"sentence {index}"),
+            'Category': {'type': 'select', 'select': {'name': 'Phrase'}},
+        },
+    }
+
+
+@dataclasses.dataclass
+class StubRequest:
+    database_id: str
+    body: dict
+    params: typing.Dict[str, str]
+
+
+class NotionStub:
+    """
+    Serves `databases` (database id -> pages, which can be changed between requests) on a local port, a page of
+    `page_size` results at a time. Cursors are positions in the database. `failures` maps the number of a request
+    (counting from 1) to the HTTP status to fail it with instead; 429s say to retry straight away.
+    """
+
+    def __init__(self, databases: typing.Dict[str, typing.List[dict]], page_size: int = 100):
+        self.databases = databases
+        self.page_size = page_size
+        self.failures: typing.Dict[int, int] = {}
+        self.requests: typing.List[StubRequest] = []
+
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                url = urllib.parse.urlsplit(self.path)
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                status, data = stub._respond(url.path, body, dict(urllib.parse.parse_qsl(url.query)))
+
+                content = json.dumps(data).encode()
+                self.send_response(status)
+                if status == 429:
+                    self.send_header('Retry-After', '0')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> 'NotionStub':
+        threading.Thread(target=self._server.serve_forever, name="notion-stub", daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _respond(self, path: str, body: dict, params: typing.Dict[str, str]) -> typing.Tuple[int, dict]:
+        # .../databases/<database id>/query
+        database_id = path.rstrip('/').split('/')[-2]
+        self.requests.append(StubRequest(database_id, body, params))
+
+        failure = self.failures.get(len(self.requests))
+        if failure is not None:
+            return failure, {'object': 'error', 'status': failure}
+
+        pages = self.databases[database_id]
+        if 'filter' in body:
+            since = body['filter']['last_edited_time']['on_or_after']
+            pages = [page for page in pages if page['last_edited_time'] >= since]
+        if params.get('filter_properties') == 'title':
+            pages = [{**page, 'properties': {'German': page['properties']['German']}} for page in pages]
+
+        start = int(body.get('start_cursor') or 0)
+        end = start + min(body.get('page_size', 100), self.page_size)
+        has_more = end < len(pages)
+
+        return 200, {
+            'object': 'list',
+            'results': pages[start:end],
+            'has_more': has_more,
+            'next_cursor': str(end) if has_more else None,
+        }
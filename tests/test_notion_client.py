@@ -0,0 +1,117 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from sean_learns_german.errors import NotionQueryFailed
+from sean_learns_german.my_async_notion_client import AsyncGermanBankNotionClient
+from sean_learns_german.my_notion_client import GermanBankNotionClient
+from sean_learns_german.notion_cache import NotionQueryCache
+from tests.notion_stub import NotionStub, phrase_page
+
+
+class GermanBankNotionClientTest(unittest.TestCase):
+    def setUp(self):
+        self.pages = [phrase_page(index) for index in range(250)]
+        self.stub = NotionStub({'bank': self.pages})
+        self.stub.__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+
+        cache_file, self.cache_filename = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(cache_file)
+        self.addCleanup(os.remove, self.cache_filename)
+
+    def load(self, cache: bool = False, **kwargs) -> list:
+        notion_cache = NotionQueryCache(self.cache_filename) if cache else None
+        client = GermanBankNotionClient(
+            "token",
+            database_ids=['bank'],
+            api_url=self.stub.url,
+            cache=notion_cache,
+            max_backoff=0.01,
+            **kwargs,
+        )
+        try:
+            with client:
+                return [item.german for item in client.load_bank_items()]
+        finally:
+            if notion_cache is not None:
+                notion_cache.close()
+
+    def test_pages_through_the_database(self):
+        self.assertEqual(self.load(), [f"Satz {index}" for index in range(250)])
+        self.assertEqual(
+            [request.body.get('start_cursor') for request in self.stub.requests],
+            [None, '100', '200'],
+        )
+
+    def test_retries_rate_limited_and_failed_requests(self):
+        self.stub.failures = {1: 429, 3: 503}
+
+        self.assertEqual(len(self.load()), 250)
+        self.assertEqual(
+            [request.body.get('start_cursor') for request in self.stub.requests],
+            [None, None, '100', '100', '200'],
+        )
+
+    def test_gives_up_with_the_cursor_to_carry_on_from(self):
+        self.stub.failures = {2: 503, 3: 503}
+
+        with self.assertRaises(NotionQueryFailed) as raised:
+            self.load(max_retries=1)
+        self.assertEqual(raised.exception.start_cursor, '100')
+
+    def test_cache_carries_on_from_an_interrupted_full_sync(self):
+        self.stub.failures = {3: 503, 4: 503}
+        with self.assertRaises(NotionQueryFailed):
+            self.load(cache=True, max_retries=1)
+
+        self.stub.requests.clear()
+        self.stub.failures = {}
+
+        self.assertEqual(self.load(cache=True), [f"Satz {index}" for index in range(250)])
+        self.assertEqual([request.body.get('start_cursor') for request in self.stub.requests], ['200'])
+
+    def test_cache_only_fetches_edited_pages(self):
+        self.load(cache=True)
+        self.stub.requests.clear()
+
+        self.pages[5] = phrase_page(5, last_edited_time="2099-01-01T00:00:00.000Z")
+        self.pages[5]['properties']['German']['title'][0]['plain_text'] = "Satz fünf"
+        del self.pages[7]
+        loaded = self.load(cache=True)
+
+        self.assertEqual(len(self.stub.requests), 1)
+        self.assertIn('filter', self.stub.requests[0].body)
+        self.assertEqual(loaded[5], "Satz fünf")
+        # Deleted pages are only noticed by a full refresh, or by listing every page.
+        self.assertIn("Satz 7", loaded)
+
+        self.stub.requests.clear()
+        loaded = self.load(cache=True, prune_deleted=True)
+
+        self.assertNotIn("Satz 7", loaded)
+        self.assertEqual(len(loaded), 249)
+        self.assertEqual([request.params for request in self.stub.requests[1:]], [{'filter_properties': 'title'}] * 3)
+
+
+class AsyncGermanBankNotionClientTest(unittest.TestCase):
+    def setUp(self):
+        self.stub = NotionStub({'bank': [phrase_page(index) for index in range(150)]})
+        self.stub.__enter__()
+        self.addCleanup(self.stub.__exit__, None, None, None)
+
+    def load(self, **kwargs) -> list:
+        async def load() -> list:
+            async with AsyncGermanBankNotionClient("token", api_url=self.stub.url, max_backoff=0.01, **kwargs) as client:
+                return [item.german async for item in client.iter_bank_items()]
+
+        return asyncio.run(load())
+
+    def test_loads_a_repeated_database_once(self):
+        self.assertEqual(self.load(database_ids=['bank', 'bank']), [f"Satz {index}" for index in range(150)])
+        self.assertEqual(len(self.stub.requests), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()